@@ -0,0 +1,181 @@
+"""
+Accounts - the set of X accounts the feed follows
+
+The list comes from ACCOUNTS_FILE (one username per line, # comments allowed)
+when it exists, otherwise from the tweet store's accounts table, otherwise
+DEFAULT_ACCOUNTS. AccountRegistry re-reads its source periodically, so accounts
+can be added or removed without a restart.
+
+For thousands of accounts each refresh cycle is split into shards: time shards
+spread the accounts over successive refreshes, and worker shards split each
+time shard between processes (WORKER_COUNT / WORKER_INDEX). Both are stable
+hashes of the username, so an account always lands in the same shards.
+
+Usage: python accounts.py import FILE   (replace the store's accounts table)
+       python accounts.py list
+"""
+
+import os
+import sys
+import threading
+import time
+import zlib
+
+DEFAULT_ACCOUNTS = [
+    'saylor',
+    'martypartymusic',
+    'RaoulGMI',
+    'Excellion',
+    'BitcoinMagazine',
+    'rektcapital',
+    'APompliano',
+    'BTC_Archive'
+]
+
+WORKER_SALT = 0x5BD1E995  # keeps worker shards independent of time shards
+
+
+def normalize_accounts(usernames):
+    """Strip @ and whitespace and drop blanks and duplicates (case-insensitively), keeping order."""
+    seen = set()
+    accounts = []
+    for name in usernames:
+        name = name.strip().lstrip('@')
+        if not name or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        accounts.append(name)
+    return accounts
+
+
+def read_accounts_file(path):
+    """Return the usernames listed in path, one per line; # starts a comment."""
+    with open(path) as f:
+        return normalize_accounts(line.split('#', 1)[0] for line in f)
+
+
+def load_account_list(path=None):
+    """Return the accounts in path if it exists, else DEFAULT_ACCOUNTS."""
+    if path and os.path.exists(path):
+        return read_accounts_file(path)
+    return list(DEFAULT_ACCOUNTS)
+
+
+def shard_of(username, shards, salt=0):
+    """Return which of shards shards username belongs to (stable across processes and restarts)."""
+    if shards <= 1:
+        return 0
+    return zlib.crc32(username.lower().encode('utf-8'), salt) % shards
+
+
+def plan_shards(accounts, shards, worker_count=1, worker_index=0):
+    """Split accounts into time shards of (owned, foreign) lists.
+
+    owned accounts are fetched by this worker; foreign ones by another worker,
+    whose results this worker reads from the shared tweet store.
+    """
+    plan = [([], []) for _ in range(max(1, shards))]
+    for username in accounts:
+        owned, foreign = plan[shard_of(username, shards)]
+        if shard_of(username, worker_count, WORKER_SALT) == worker_index:
+            owned.append(username)
+        else:
+            foreign.append(username)
+    return plan
+
+
+class AccountRegistry:
+    """The followed accounts, reloaded from their source when it changes."""
+
+    def __init__(self, path=None, store=None, reload_interval=30):
+        self.path = path
+        self.store = store  # callable returning the TweetStore (or None)
+        self.reload_interval = reload_interval
+        self.source = None
+        self._accounts = []
+        self._by_lower = {}
+        self._file_mtime = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    @property
+    def accounts(self):
+        return self._accounts
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def canonical(self, username):
+        """Return the followed account's spelling of username, or None if it isn't followed."""
+        return self._by_lower.get(username.strip().lstrip('@').lower())
+
+    def _load(self):
+        """Return (accounts, source, file mtime) from the highest-priority source available."""
+        if self.path:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime is not None:
+                return read_accounts_file(self.path), 'file', mtime
+
+        store = self.store() if self.store else None
+        if store is not None:
+            try:
+                stored = store.followed_accounts()
+            except Exception as e:
+                print(f"Error loading accounts from tweet store: {e}")
+                stored = None
+            if stored:
+                return normalize_accounts(stored), 'store', None
+
+        return list(DEFAULT_ACCOUNTS), 'default', None
+
+    def refresh(self, force=False):
+        """Reload the accounts if reload_interval has passed; return True if the list changed."""
+        now = time.time()
+        if not force and now - self._checked_at < self.reload_interval:
+            return False
+
+        with self._lock:
+            self._checked_at = now
+            if not force and self.source == 'file' and self._file_mtime is not None:
+                # Cheap check first: an unchanged file means nothing to reload
+                try:
+                    if os.stat(self.path).st_mtime == self._file_mtime:
+                        return False
+                except OSError:
+                    pass
+            try:
+                accounts, source, mtime = self._load()
+            except Exception as e:
+                print(f"Error loading accounts: {e}")
+                return False
+            if not accounts:
+                # An emptied file is far more likely a mistake than a wish to follow nobody
+                print("Account source is empty; keeping the current accounts")
+                return False
+
+            self._file_mtime = mtime
+            changed = accounts != self._accounts or source != self.source
+            self.source = source
+            if changed:
+                self._accounts = accounts
+                self._by_lower = {name.lower(): name for name in accounts}
+            return changed
+
+
+if __name__ == '__main__':
+    from tweet_store import TweetStore
+
+    store = TweetStore(os.getenv('TWEET_DB_PATH') or 'tweets.db')
+    if len(sys.argv) == 3 and sys.argv[1] == 'import':
+        accounts = read_accounts_file(sys.argv[2])
+        store.replace_followed_accounts(accounts)
+        print(f"Stored {len(accounts)} accounts")
+    elif len(sys.argv) == 2 and sys.argv[1] == 'list':
+        print('\n'.join(store.followed_accounts()))
+    else:
+        print(__doc__.strip().split('Usage: ', 1)[1], file=sys.stderr)
+        sys.exit(1)
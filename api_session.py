@@ -0,0 +1,66 @@
+"""
+API Session - pooled HTTP session for the Twitter API client
+
+A requests Session with a keep-alive connection pool sized to the fetch
+concurrency, default connect/read timeouts and a retry policy for transient
+server errors. It also reports how often pooled connections are reused.
+
+tweepy always calls https://api.twitter.com; with a base_url the session sends
+those requests to another server instead (e.g. fake_twitter_api.py).
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TWITTER_API_HOST = 'https://api.twitter.com'
+
+
+class ApiSession(requests.Session):
+    """Session shared by every API call in the process."""
+
+    def __init__(self, pool_size, connect_timeout, read_timeout, retries, backoff_factor, base_url=None):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        self.base_url = base_url.rstrip('/') if base_url else None
+
+        # Retry transient server errors and dropped connections; 429s are left to the
+        # poll scheduler, and the final response is handed back to tweepy either way
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.mount('https://', self.adapter)
+        self.mount('http://', self.adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.base_url and url.startswith(TWITTER_API_HOST):
+            url = self.base_url + url[len(TWITTER_API_HOST):]
+        return super().request(method, url, **kwargs)
+
+    def connection_stats(self):
+        """Return request and connection counts across the pool's hosts.
+
+        `connections` counts new connections (each a TCP + TLS handshake), so
+        `reused` is how many requests went out on an existing connection.
+        """
+        requests_made = connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_made += pool.num_requests
+                connections += pool.num_connections
+        return {
+            'requests': requests_made,
+            'connections': connections,
+            'reused': requests_made - connections
+        }
@@ -0,0 +1,249 @@
+"""
+Feed pipeline benchmarks
+
+Times each stage of the fetch -> merge -> serialize pipeline and compares the
+results against a stored baseline:
+
+- fetch: fetch_all_tweets against fake_twitter_api.py with simulated upstream
+  latency, cold (user lookup + full timelines) and incremental (since_id polls)
+- merge: k-way merge of per-account timelines and page index build
+- serialize: jsonify and snapshot publishing at 1k/10k/100k tweets
+- requests: end-to-end /tweets requests through the Flask test client
+
+Each result is the median seconds per operation. A stage more than --tolerance
+(50% by default) slower than its baseline is reported as a regression and the
+exit status is 1. Timings are machine specific: record the baseline with
+--save-baseline on the machine that runs the comparison.
+
+Usage: python benchmarks/pipeline.py [--quick] [--save-baseline] [--output results.json]
+"""
+
+import argparse
+import heapq
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_twitter_api import FakeTwitterApi, serve_in_thread
+from synthetic_data import synthetic_accounts, synthetic_timelines
+
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+SEED = 42
+END_TS = 1_750_000_000  # fixed, so every run benchmarks the same tweets
+
+
+def timed(fn, repeat, setup=None, min_sample=0.05):
+    """Run fn repeat times (after setup each time) and return its timing summary.
+
+    Without a setup, fast operations are looped until each sample takes at
+    least min_sample seconds, as timeit does, so sub-millisecond stages give
+    stable numbers.
+    """
+    number = 1
+    if setup is None:
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - start >= min_sample:
+                break
+            number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {'seconds': statistics.median(samples), 'min': min(samples), 'runs': repeat * number}
+
+
+def start_fake_api(latency):
+    """Start the fake API and point the feed at it; must run before x_bitcoin_feed is imported."""
+    api = FakeTwitterApi(seed=SEED, latency=latency, jitter=0.2, rate_limits={
+        '/2/users/by': 10 ** 9,
+        '/2/users/by/username/:username': 10 ** 9,
+        '/2/users/:id/tweets': 10 ** 9,
+    })
+    server, base_url = serve_in_thread(api)
+    os.environ['TWITTER_API_BASE_URL'] = base_url
+    os.environ['TWITTER_BEARER_TOKEN'] = 'benchmark'
+    os.environ['TWEET_DB_PATH'] = ''
+    os.environ['SHARED_CACHE_BACKEND'] = ''
+    os.environ['BACKGROUND_REFRESH'] = '0'
+    os.environ['USER_ID_CACHE_FILE'] = os.path.join(tempfile.mkdtemp(), 'user_ids.json')
+    return api, server
+
+
+def reset_feed(feed, keep_since_ids=False):
+    """Forget cached tweets (and optionally since_ids) so the next fetch goes upstream."""
+    feed.tweet_cache = []
+    feed.last_fetch_time = 0
+    feed.poll_scheduler = feed.PollScheduler(
+        feed.TIMELINE_ENDPOINT,
+        min_interval=feed.POLL_MIN_INTERVAL,
+        max_interval=feed.POLL_MAX_INTERVAL,
+        refresh_interval=feed.CACHE_SOFT_TTL,
+        reserve=feed.RATE_LIMIT_RESERVE
+    )
+    if not keep_since_ids:
+        feed.account_timelines.clear()
+        feed.since_ids.clear()
+        feed.user_id_cache.clear()
+
+
+def bench_fetch(feed, account_counts, repeat):
+    results = {}
+    default_accounts = feed.ACCOUNTS
+    try:
+        for count in account_counts:
+            feed.apply_accounts(synthetic_accounts(count))
+            results[f'fetch_cold_{count}_accounts'] = timed(
+                feed.fetch_all_tweets, repeat, setup=lambda: reset_feed(feed)
+            )
+            results[f'fetch_incremental_{count}_accounts'] = timed(
+                feed.fetch_all_tweets, repeat, setup=lambda: reset_feed(feed, keep_since_ids=True)
+            )
+    finally:
+        feed.apply_accounts(default_accounts)
+        reset_feed(feed)
+    return results
+
+
+def bench_merge(feed, sizes, repeat):
+    results = {}
+    for size in sizes:
+        by_user = synthetic_timelines(feed.ACCOUNTS, size // len(feed.ACCOUNTS), SEED, END_TS)
+        merged = list(heapq.merge(*by_user.values(), key=feed.tweet_sort_key, reverse=True))
+        results[f'merge_{size}'] = timed(
+            lambda: list(heapq.merge(*by_user.values(), key=feed.tweet_sort_key, reverse=True)), repeat
+        )
+        results[f'page_index_{size}'] = timed(lambda: feed.build_page_index(merged), repeat)
+    return results
+
+
+def bench_serialize(feed, sizes, repeat):
+    results = {}
+    for size in sizes:
+        by_user = synthetic_timelines(feed.ACCOUNTS, size // len(feed.ACCOUNTS), SEED, END_TS)
+        merged = list(heapq.merge(*by_user.values(), key=feed.tweet_sort_key, reverse=True))
+        with feed.app.app_context():
+            results[f'jsonify_{size}'] = timed(lambda: feed.jsonify(merged).get_data(), repeat)
+        results[f'publish_snapshot_{size}'] = timed(
+            lambda: feed.publish_snapshot(merged, by_user, time.time()), repeat
+        )
+    reset_feed(feed)
+    return results
+
+
+def bench_requests(feed, size, repeat):
+    """Time /tweets variants through the test client against a published snapshot of size tweets."""
+    by_user = synthetic_timelines(feed.ACCOUNTS, size // len(feed.ACCOUNTS), SEED, END_TS)
+    merged = list(heapq.merge(*by_user.values(), key=feed.tweet_sort_key, reverse=True))
+    client = feed.app.test_client()
+    accounts = ','.join(feed.ACCOUNTS[:2])
+    cases = {
+        'request_tweets': ('/tweets', {}),
+        'request_tweets_gzip': ('/tweets', {'Accept-Encoding': 'gzip'}),
+        'request_tweets_not_modified': ('/tweets', None),
+        'request_tweets_page_200': (f'/tweets?limit={feed.MAX_PAGE_SIZE}', {}),
+        'request_tweets_accounts': (f'/tweets?accounts={accounts}', {}),
+    }
+
+    results = {}
+    try:
+        for name, (path, headers) in cases.items():
+            feed.publish_snapshot(merged, by_user, time.time())
+            if headers is None:
+                headers = {'If-None-Match': f'"{feed.current_snapshot.etag}"'}
+
+            result = timed(lambda: client.get(path, headers=headers).get_data(), repeat)
+            result['requests_per_second'] = round(1 / result['seconds'], 1)
+            results[name] = result
+    finally:
+        reset_feed(feed)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return {name: ratio} for results slower than baseline by more than tolerance."""
+    regressions = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get('seconds'):
+            continue
+        ratio = result['seconds'] / base['seconds']
+        if ratio > 1 + tolerance:
+            regressions[name] = round(ratio, 2)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='smaller sizes and fewer runs')
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated upstream latency (seconds)')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown before a regression')
+    parser.add_argument('--output', help='also write the results JSON here')
+    args = parser.parse_args()
+
+    sizes = [1_000, 10_000] if args.quick else [1_000, 10_000, 100_000]
+    repeat = 3 if args.quick else 7
+
+    api, server = start_fake_api(args.latency)
+    import x_bitcoin_feed as feed
+
+    try:
+        results = {}
+        results.update(bench_fetch(feed, [len(feed.ACCOUNTS), 64], repeat))
+        results.update(bench_merge(feed, sizes, repeat))
+        results.update(bench_serialize(feed, sizes, repeat))
+        results.update(bench_requests(feed, 1_000, repeat))
+    finally:
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': int(time.time()),
+            'latency': args.latency,
+            'quick': args.quick,
+        },
+        'results': {name: {key: round(value, 6) if isinstance(value, float) else value
+                           for key, value in result.items()}
+                    for name, result in results.items()},
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    else:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        except FileNotFoundError:
+            baseline = {}
+        report['regressions'] = compare(report['results'], baseline, args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
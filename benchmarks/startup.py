@@ -0,0 +1,145 @@
+"""
+Startup benchmark
+
+Starts the app as production would (`python run.py --production`) against
+fake_twitter_api.py and reports the time from launching the process to the
+first successful /tweets response:
+
+- cold: nothing saved yet, so the first response waits for a full refresh
+- snapshot: restarted with the snapshot the previous run published
+- store: no snapshot, restarted with the tweet store the previous run saved
+- import: time to import x_bitcoin_feed alone, the floor for all of the above
+
+Each result is the median of --repeat starts, in seconds.
+
+Usage: python benchmarks/startup.py [--repeat 5] [--latency 0.05] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_twitter_api import FakeTwitterApi, serve_in_thread
+
+STARTUP_TIMEOUT = 60  # seconds to wait for the first /tweets response
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def app_env(base_url, state_dir, shared_cache=True):
+    """Environment for one app process keeping all of its state in state_dir."""
+    return dict(
+        os.environ,
+        TWITTER_API_BASE_URL=base_url,
+        TWITTER_BEARER_TOKEN='benchmark',
+        TWEET_DB_PATH=os.path.join(state_dir, 'tweets.db'),
+        USER_ID_CACHE_FILE=os.path.join(state_dir, 'user_ids.json'),
+        SHARED_CACHE_BACKEND='mmap' if shared_cache else '',
+        SHARED_CACHE_PATH=os.path.join(state_dir, 'feed_snapshot'),
+        ACCOUNTS_FILE=os.path.join(state_dir, 'accounts.txt'),
+        PYTHONUNBUFFERED='1',
+    )
+
+
+def time_to_first_tweets(env):
+    """Launch the app and return seconds until /tweets first answers 200 with tweets."""
+    port = free_port()
+    url = f'http://127.0.0.1:{port}/tweets'
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'run.py'), '--production'],
+        cwd=ROOT, env=dict(env, PORT=str(port)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < STARTUP_TIMEOUT:
+            if process.poll() is not None:
+                raise RuntimeError(f"App exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=STARTUP_TIMEOUT) as response:
+                    if response.status == 200 and json.loads(response.read()):
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise RuntimeError(f"No tweets from {url} after {STARTUP_TIMEOUT}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def time_import(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import x_bitcoin_feed'], cwd=ROOT, env=env,
+                   stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def summarize(samples):
+    return {'seconds': statistics.median(samples), 'min': min(samples), 'runs': len(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated upstream latency (seconds)')
+    parser.add_argument('--output', help='also write the results JSON here')
+    args = parser.parse_args()
+
+    api = FakeTwitterApi(latency=args.latency, rate_limits={
+        '/2/users/by': 10 ** 9,
+        '/2/users/by/username/:username': 10 ** 9,
+        '/2/users/:id/tweets': 10 ** 9,
+    })
+    server, base_url = serve_in_thread(api)
+
+    samples = {'cold': [], 'snapshot': [], 'store': [], 'import': []}
+    try:
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as state_dir:
+                env = app_env(base_url, state_dir)
+                samples['import'].append(time_import(env))
+                samples['cold'].append(time_to_first_tweets(env))
+                samples['snapshot'].append(time_to_first_tweets(env))
+                samples['store'].append(time_to_first_tweets(app_env(base_url, state_dir, shared_cache=False)))
+    finally:
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': int(time.time()),
+            'latency': args.latency,
+        },
+        'results': {f'first_tweets_{name}' if name != 'import' else 'import': {
+            key: round(value, 6) if isinstance(value, float) else value
+            for key, value in summarize(values).items()
+        } for name, values in samples.items()},
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
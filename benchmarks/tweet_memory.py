@@ -0,0 +1,87 @@
+"""
+Tweet memory benchmark
+
+Compares the memory used by N tweets held as the original nested dicts
+(dict + metrics dict + media list + datetime) against slotted Tweet objects.
+
+Usage: python benchmarks/tweet_memory.py [count]
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tweet_model import Tweet
+
+ACCOUNTS = ['saylor', 'martypartymusic', 'RaoulGMI', 'Excellion',
+            'BitcoinMagazine', 'rektcapital', 'APompliano', 'BTC_Archive']
+TEXT = "Bitcoin is the apex digital monetary asset of the human race. #Bitcoin"
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def raw_fields(count):
+    """Yield the values one tweet is built from, as the API layer would see them."""
+    for i in range(count):
+        yield (
+            1800000000000000000 + i,
+            TEXT,
+            START + timedelta(seconds=37 * i),
+            # Build the username fresh, as decoding an API response would
+            ''.join(ACCOUNTS[i % len(ACCOUNTS)]),
+            {'like_count': 500 + i % 9000, 'retweet_count': 100 + i % 1900, 'reply_count': 50 + i % 450},
+        )
+
+
+def build_dicts(count):
+    return [
+        {
+            'id': tweet_id,
+            'text': text,
+            'created_at': created_at,
+            'username': username,
+            'metrics': dict(metrics),
+            'media_urls': []
+        }
+        for tweet_id, text, created_at, username, metrics in raw_fields(count)
+    ]
+
+
+def build_tweets(count):
+    return [
+        Tweet.create(tweet_id, text, created_at, username, metrics)
+        for tweet_id, text, created_at, username, metrics in raw_fields(count)
+    ]
+
+
+def measure(builder, count):
+    """Return bytes still allocated after building count tweets with builder."""
+    gc.collect()
+    tracemalloc.start()
+    tweets = builder(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tweets
+    return current
+
+
+def run(count=100_000):
+    dict_bytes = measure(build_dicts, count)
+    tweet_bytes = measure(build_tweets, count)
+    return {
+        'count': count,
+        'dict_bytes': dict_bytes,
+        'tweet_bytes': tweet_bytes,
+        'dict_bytes_per_tweet': round(dict_bytes / count, 1),
+        'tweet_bytes_per_tweet': round(tweet_bytes / count, 1),
+        'reduction': round(1 - tweet_bytes / dict_bytes, 3),
+    }
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(json.dumps(run(count), indent=2))
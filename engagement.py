@@ -0,0 +1,223 @@
+"""
+Engagement Analytics - vectorized engagement statistics for /analytics/engagement
+
+EngagementColumns holds a snapshot's tweets as columnar NumPy arrays (created
+time, likes, retweets, replies, id, engagement score and account code), built
+once per snapshot. Every statistic is then computed over whole columns:
+per-account totals and rates with bincount, per-account medians from one sort,
+rolling windows from a cumulative sum over time buckets, and the top tweets
+with a partial sort, so a report over hundreds of thousands of tweets takes
+tens of milliseconds.
+
+Engagement is scored as in search_index.engagement_score: retweets and replies
+count for more than likes.
+
+NumPy is imported when the first columns are built rather than with this
+module, so it stays off the app's startup path.
+"""
+
+import importlib.util
+
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+np = None
+
+# Same weights as search_index.engagement_score
+LIKE_WEIGHT = 1
+RETWEET_WEIGHT = 2
+REPLY_WEIGHT = 3
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+MIN_ACCOUNT_SPAN = 3600  # seconds; keeps tweets_per_day sane for accounts with a single recent tweet
+
+
+def load_numpy():
+    """Import numpy on first use."""
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+
+class EngagementColumns:
+    """One snapshot's tweets as parallel NumPy arrays, grouped by account.
+
+    Each account's rows are contiguous and in by_user order (newest first within
+    the account), so every selection keeps accounts grouped. An account whose
+    timeline is the same list object as in the previous columns reuses its
+    converted block, so after a sharded refresh only the refetched accounts are
+    converted again.
+    """
+
+    def __init__(self, by_user, previous=None):
+        load_numpy()
+        reusable = previous._blocks if previous is not None else {}
+        self._blocks = {}
+        self.usernames = []
+        self.tweets = []
+        blocks = []
+        for username, timeline in by_user.items():
+            if not timeline:
+                continue
+            cached = reusable.get(username)
+            if cached is not None and cached[0] is timeline:
+                block = cached[1]
+            else:
+                block = np.array(
+                    [(tweet.created_ts, tweet.like_count, tweet.retweet_count, tweet.reply_count, int(tweet.id))
+                     for tweet in timeline],
+                    dtype=np.int64
+                ).T
+            self._blocks[username] = (timeline, block)
+            self.usernames.append(username)
+            self.tweets.extend(timeline)
+            blocks.append(block)
+
+        columns = np.concatenate(blocks, axis=1) if blocks else np.empty((5, 0), dtype=np.int64)
+        self.created, self.likes, self.retweets, self.replies, self.ids = columns
+        self.engagement = LIKE_WEIGHT * self.likes + RETWEET_WEIGHT * self.retweets + REPLY_WEIGHT * self.replies
+        self.account = np.repeat(np.arange(len(blocks)), [block.shape[1] for block in blocks])
+        self.account_codes = {username: code for code, username in enumerate(self.usernames)}
+
+    def __len__(self):
+        return len(self.tweets)
+
+    def select(self, usernames=None, since=None, until=None):
+        """Return the indices of the rows matching the filters (ascending); None means every row."""
+        mask = None
+        if usernames is not None:
+            wanted = [self.account_codes[name] for name in usernames if name in self.account_codes]
+            mask = np.isin(self.account, wanted)
+        if since is not None:
+            mask = (self.created >= since) if mask is None else mask & (self.created >= since)
+        if until is not None:
+            mask = (self.created <= until) if mask is None else mask & (self.created <= until)
+        return None if mask is None else np.flatnonzero(mask)
+
+
+def account_stats(columns, rows=None):
+    """Return per-account totals, rates and median engagement, most engagement per tweet first."""
+    account = columns.account if rows is None else columns.account[rows]
+    if not len(account):
+        return []
+    engagement = columns.engagement if rows is None else columns.engagement[rows]
+    created = columns.created if rows is None else columns.created[rows]
+    size = len(columns.usernames)
+
+    counts = np.bincount(account, minlength=size)
+    totals = {
+        name: np.bincount(account, weights=values, minlength=size)
+        for name, values in (
+            ('likes', columns.likes if rows is None else columns.likes[rows]),
+            ('retweets', columns.retweets if rows is None else columns.retweets[rows]),
+            ('replies', columns.replies if rows is None else columns.replies[rows]),
+            ('engagement', engagement),
+        )
+    }
+
+    # Rows stay grouped by account, so each account is one run starting here
+    present = np.flatnonzero(counts)
+    starts = np.concatenate(([0], np.cumsum(counts[present])[:-1]))
+    present_counts = counts[present]
+
+    # Posting rate from each account's first tweet up to the newest tweet selected
+    first = np.minimum.reduceat(created, starts)
+    span = np.maximum(created.max() - first, MIN_ACCOUNT_SPAN)
+
+    # Medians: one sort on (account, engagement), then each run's middle rows
+    ordered = np.sort((account << 40) | engagement) & ((1 << 40) - 1)
+    medians = (ordered[starts + (present_counts - 1) // 2] + ordered[starts + present_counts // 2]) / 2
+
+    total_engagement = totals['engagement'].sum() or 1
+    stats = []
+    for code, count, median, seconds in zip(present.tolist(), present_counts.tolist(),
+                                            medians.tolist(), span.tolist()):
+        engagement_total = int(totals['engagement'][code])
+        stats.append({
+            'username': columns.usernames[code],
+            'tweets': count,
+            'likes': int(totals['likes'][code]),
+            'retweets': int(totals['retweets'][code]),
+            'replies': int(totals['replies'][code]),
+            'engagement': engagement_total,
+            'engagement_per_tweet': round(engagement_total / count, 2),
+            'median_engagement': median,
+            'engagement_share': round(engagement_total / total_engagement, 4),
+            'tweets_per_day': round(count * 86400 / seconds, 2),
+        })
+    stats.sort(key=lambda entry: (-entry['engagement_per_tweet'], entry['username'].lower()))
+    return stats
+
+
+def percentiles(columns, rows=None, points=DEFAULT_PERCENTILES):
+    """Return {metric: {'p50': ..., ...}} for likes, retweets, replies and engagement."""
+    result = {}
+    for name in ('likes', 'retweets', 'replies', 'engagement'):
+        values = getattr(columns, name)
+        if rows is not None:
+            values = values[rows]
+        if not len(values):
+            result[name] = {}
+            continue
+        result[name] = {
+            f"p{point:g}": round(float(value), 2)
+            for point, value in zip(points, np.percentile(values, points))
+        }
+    return result
+
+
+def rolling_windows(columns, rows=None, bucket=3600, window=24, points=48):
+    """Return the last `points` buckets of `bucket` seconds, each with its own totals and
+    the rolling totals of the `window` buckets ending with it.
+
+    Buckets are aligned to the newest selected tweet, so the last bucket always
+    ends at that tweet.
+    """
+    created = columns.created if rows is None else columns.created[rows]
+    if not len(created):
+        return []
+    engagement = columns.engagement if rows is None else columns.engagement[rows]
+
+    end = int(created.max()) + 1
+    span = points + window - 1  # buckets needed to fill the first point's rolling window
+    start = end - span * bucket
+    inside = created >= start
+    index = (created[inside] - start) // bucket
+    counts = np.bincount(index, minlength=span)
+    sums = np.bincount(index, weights=engagement[inside], minlength=span)
+
+    count_cumsum = np.concatenate(([0], np.cumsum(counts)))
+    sum_cumsum = np.concatenate(([0], np.cumsum(sums)))
+    last = np.arange(window, span + 1)  # one past each point's last bucket
+    rolling_counts = count_cumsum[last] - count_cumsum[last - window]
+    rolling_sums = sum_cumsum[last] - sum_cumsum[last - window]
+
+    result = []
+    for position, (count, total, rolling_count, rolling_total) in enumerate(zip(
+            counts[window - 1:].tolist(), sums[window - 1:].tolist(),
+            rolling_counts.tolist(), rolling_sums.tolist())):
+        result.append({
+            'start': start + (window - 1 + position) * bucket,
+            'tweets': count,
+            'engagement': int(total),
+            'rolling_tweets': rolling_count,
+            'rolling_engagement': int(rolling_total),
+            'rolling_engagement_per_tweet': round(rolling_total / rolling_count, 2) if rolling_count else 0,
+        })
+    return result
+
+
+def top_tweets(columns, rows=None, limit=10):
+    """Return [(engagement, Tweet)] for the limit most engaging tweets, newest first on ties."""
+    engagement = columns.engagement if rows is None else columns.engagement[rows]
+    if not len(engagement) or limit <= 0:
+        return []
+    limit = min(limit, len(engagement))
+
+    # Everything scoring at least the limit-th best is a candidate; rank only those
+    threshold = np.partition(engagement, len(engagement) - limit)[len(engagement) - limit]
+    candidates = np.flatnonzero(engagement >= threshold)
+    positions = candidates if rows is None else rows[candidates]
+    # Order by (engagement, created, id) descending, the order search results use
+    order = np.lexsort((columns.ids[positions], columns.created[positions], engagement[candidates]))[::-1]
+    best = order[:limit]
+    return [(int(engagement[candidates[index]]), columns.tweets[positions[index]]) for index in best.tolist()]
@@ -0,0 +1,285 @@
+"""
+Fake Twitter API - local stand-in for the Twitter v2 endpoints the feed uses
+
+Serves users lookup (/2/users/by, /2/users/by/username/<username>) and user
+timelines (/2/users/<id>/tweets, with since_id, until_id, pagination_token,
+max_results and includes.media) from the seeded synthetic generator, so the
+real tweepy fetch path can be exercised and load tested without network access.
+
+Every response carries x-rate-limit-* headers from per-endpoint windows, and
+latency, server errors and 429s can be injected. Timelines extend a little past
+startup, so new tweets "arrive" over time and since_id polling sees them.
+
+Point the app at it with:
+    TWITTER_API_BASE_URL=http://127.0.0.1:5055 TWITTER_BEARER_TOKEN=fake python x_bitcoin_feed.py
+
+Usage: python fake_twitter_api.py [PORT]
+"""
+
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from synthetic_data import DEFAULT_SEED, iter_account_tweets, synthetic_accounts
+
+# Data settings
+FAKE_API_SEED = int(os.getenv('FAKE_API_SEED', str(DEFAULT_SEED)))
+FAKE_API_TWEETS_PER_ACCOUNT = int(os.getenv('FAKE_API_TWEETS_PER_ACCOUNT', '200'))
+FAKE_API_LIVE_WINDOW = int(os.getenv('FAKE_API_LIVE_WINDOW', '3600'))  # seconds of tweets still to "arrive"
+
+# Fault injection
+FAKE_API_LATENCY = float(os.getenv('FAKE_API_LATENCY', '0'))  # mean seconds added to each response
+FAKE_API_JITTER = float(os.getenv('FAKE_API_JITTER', '0.5'))  # +/- fraction of the latency
+FAKE_API_ERROR_RATE = float(os.getenv('FAKE_API_ERROR_RATE', '0'))  # fraction of 503 responses
+FAKE_API_429_RATE = float(os.getenv('FAKE_API_429_RATE', '0'))  # fraction of spurious 429s
+
+# Rate limits per endpoint (requests per window, app auth)
+FAKE_API_RATE_WINDOW = int(os.getenv('FAKE_API_RATE_WINDOW', '900'))
+RATE_LIMITS = {
+    '/2/users/by': int(os.getenv('FAKE_API_USERS_LIMIT', '300')),
+    '/2/users/by/username/:username': int(os.getenv('FAKE_API_USERS_LIMIT', '300')),
+    '/2/users/:id/tweets': int(os.getenv('FAKE_API_TIMELINE_LIMIT', '1500')),
+}
+
+
+def user_id_for(username):
+    """Return a stable numeric user id for username."""
+    digest = hashlib.sha1(username.lower().encode('utf-8')).hexdigest()
+    return str(int(digest[:15], 16))
+
+
+def api_error(status, title, detail):
+    return jsonify({'title': title, 'detail': detail, 'status': status}), status
+
+
+def tweet_payload(tweet, author_id):
+    """Return the v2 JSON for a synthetic Tweet, as requested with the feed's tweet.fields."""
+    payload = {
+        'id': tweet.id,
+        'text': tweet.text,
+        'edit_history_tweet_ids': [tweet.id],
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(tweet.created_ts)),
+        'author_id': author_id,
+        'public_metrics': {
+            'like_count': tweet.like_count,
+            'retweet_count': tweet.retweet_count,
+            'reply_count': tweet.reply_count,
+            'quote_count': 0
+        }
+    }
+    if tweet.media_urls:
+        payload['attachments'] = {'media_keys': [f"3_{tweet.id}_{i}" for i in range(len(tweet.media_urls))]}
+    return payload
+
+
+class FakeTwitterApi:
+    """State behind the fake server: accounts, timelines, rate-limit windows and faults."""
+
+    def __init__(self, seed=FAKE_API_SEED, tweets_per_account=FAKE_API_TWEETS_PER_ACCOUNT,
+                 live_window=FAKE_API_LIVE_WINDOW, latency=FAKE_API_LATENCY, jitter=FAKE_API_JITTER,
+                 error_rate=FAKE_API_ERROR_RATE, rate_429=FAKE_API_429_RATE,
+                 rate_window=FAKE_API_RATE_WINDOW, rate_limits=None, accounts=None, clock=time.time):
+        self.seed = seed
+        self.tweets_per_account = tweets_per_account
+        self.live_window = live_window
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.rate_window = rate_window
+        self.rate_limits = dict(rate_limits or RATE_LIMITS)
+        self.clock = clock  # decides which tweets have "arrived"; tests pass one they can advance
+        self.started_at = int(clock())
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._usernames = {}  # user id -> username
+        self._timelines = {}  # user id -> [Tweet], newest first
+        self._windows = {}  # endpoint -> [reset, used]
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0}
+
+        for username in accounts or synthetic_accounts(8):
+            self.register(username)
+
+    def register(self, username):
+        """Make username resolvable and return its user id."""
+        user_id = user_id_for(username)
+        with self._lock:
+            self._usernames.setdefault(user_id, username)
+        return user_id
+
+    def user_payload(self, username):
+        return {'id': self.register(username), 'name': username, 'username': username}
+
+    def timeline(self, user_id):
+        """Return the account's visible tweets (posted by now), newest first, or None if unknown."""
+        with self._lock:
+            username = self._usernames.get(user_id)
+            tweets = self._timelines.get(user_id)
+        if username is None:
+            return None
+        if tweets is None:
+            # Generated once per account; the newest live_window seconds of it are still in the future
+            tweets = list(iter_account_tweets(
+                username, self.tweets_per_account, self.seed, self.started_at + self.live_window
+            ))
+            with self._lock:
+                tweets = self._timelines.setdefault(user_id, tweets)
+        now = self.clock()
+        return [tweet for tweet in tweets if tweet.created_ts <= now]
+
+    def take_quota(self, endpoint):
+        """Count a request against endpoint's window; return (limit, remaining, reset, allowed)."""
+        limit = self.rate_limits[endpoint]
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(endpoint)
+            if window is None or now >= window[0]:
+                window = self._windows[endpoint] = [int(now) + self.rate_window, 0]
+            allowed = window[1] < limit
+            if allowed:
+                window[1] += 1
+            return limit, limit - window[1], window[0], allowed
+
+    def count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def stats_snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def inject_fault(self):
+        """Sleep for the configured latency and return an injected status (503/429) or None."""
+        with self._lock:
+            delay = self.latency * (1 + self._rng.uniform(-self.jitter, self.jitter)) if self.latency else 0
+            roll = self._rng.random()
+        if delay > 0:
+            time.sleep(delay)
+        if roll < self.error_rate:
+            return 503
+        if roll < self.error_rate + self.rate_429:
+            return 429
+        return None
+
+
+def create_app(api=None):
+    """Return the Flask app serving the fake API (a new FakeTwitterApi with env settings by default)."""
+    api = api or FakeTwitterApi()
+    app = Flask(__name__)
+    app.config['FAKE_API'] = api
+
+    def handle(endpoint, build):
+        """Apply faults and rate limits around build(), which returns the JSON response."""
+        api.count('requests')
+        fault = api.inject_fault()
+        if fault == 503:
+            api.count('errors')
+            return api_error(503, 'Service Unavailable', 'Injected server error')
+
+        limit, remaining, reset, allowed = api.take_quota(endpoint)
+        if fault == 429:
+            allowed, remaining = False, 0
+        if allowed:
+            response = build()
+        else:
+            api.count('rate_limited')
+            response = api_error(429, 'Too Many Requests', 'Too Many Requests')
+        if isinstance(response, tuple):
+            response = app.make_response(response)
+        response.headers['x-rate-limit-limit'] = str(limit)
+        response.headers['x-rate-limit-remaining'] = str(remaining)
+        response.headers['x-rate-limit-reset'] = str(reset)
+        return response
+
+    @app.route('/2/users/by')
+    def users_by():
+        def build():
+            usernames = [name for name in request.args.get('usernames', '').split(',') if name]
+            if not usernames or len(usernames) > 100:
+                return api_error(400, 'Invalid Request', 'usernames must list 1 to 100 usernames')
+            return jsonify({'data': [api.user_payload(username) for username in usernames]})
+        return handle('/2/users/by', build)
+
+    @app.route('/2/users/by/username/<username>')
+    def user_by_username(username):
+        return handle('/2/users/by/username/:username', lambda: jsonify({'data': api.user_payload(username)}))
+
+    @app.route('/2/users/<user_id>/tweets')
+    def user_tweets(user_id):
+        def build():
+            tweets = api.timeline(user_id)
+            if tweets is None:
+                return api_error(404, 'Not Found Error', f"Could not find user with id: [{user_id}].")
+
+            try:
+                max_results = int(request.args.get('max_results', '10'))
+            except ValueError:
+                max_results = 0
+            if not 5 <= max_results <= 100:
+                return api_error(400, 'Invalid Request', 'max_results must be between 5 and 100')
+
+            since_id = request.args.get('since_id')
+            until_id = request.args.get('pagination_token') or request.args.get('until_id')
+            if since_id:
+                tweets = [tweet for tweet in tweets if int(tweet.id) > int(since_id)]
+            if until_id:
+                tweets = [tweet for tweet in tweets if int(tweet.id) < int(until_id)]
+            page = tweets[:max_results]
+
+            meta = {'result_count': len(page)}
+            if not page:
+                return jsonify({'meta': meta})
+            meta['newest_id'] = page[0].id
+            meta['oldest_id'] = page[-1].id
+            if len(tweets) > len(page):
+                meta['next_token'] = page[-1].id
+
+            body = {'data': [tweet_payload(tweet, user_id) for tweet in page], 'meta': meta}
+            expansions = request.args.get('expansions', '').split(',')
+            if 'attachments.media_keys' in expansions:
+                media = [
+                    {'media_key': f"3_{tweet.id}_{i}", 'type': 'photo', 'url': url}
+                    for tweet in page
+                    for i, url in enumerate(tweet.media_urls)
+                ]
+                if media:
+                    body['includes'] = {'media': media}
+            return jsonify(body)
+        return handle('/2/users/:id/tweets', build)
+
+    @app.route('/_fake/stats')
+    def fake_stats():
+        return jsonify(api.stats_snapshot())
+
+    return app
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler without per-request access logging (it dominates under load)."""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve_in_thread(api=None, host='127.0.0.1', port=0):
+    """Start the fake API on a background thread; return (server, base_url).
+
+    Call server.shutdown() to stop it. Port 0 picks a free port.
+    """
+    server = make_server(host, port, create_app(api), threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, name='fake-twitter-api', daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.getenv('FAKE_API_PORT', '5055'))
+    print(f"Fake Twitter API on http://127.0.0.1:{port} "
+          f"(set TWITTER_API_BASE_URL=http://127.0.0.1:{port} and any TWITTER_BEARER_TOKEN)")
+    create_app().run(host='127.0.0.1', port=port, threaded=True)
@@ -0,0 +1,161 @@
+"""
+Metrics - minimal Prometheus instrumentation for the Bitcoin X Feed
+
+Counters, gauges and histograms with labels, kept in a MetricsRegistry and
+rendered in the Prometheus text exposition format for /metrics. Values that
+already live elsewhere (cache counters, rate-limit quotas, snapshot sizes) are
+read at scrape time by collector callbacks instead of being duplicated.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers in-process work (ms) through slow upstream calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Metric:
+    """A named metric family with a fixed set of label names."""
+
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yield (suffix, labels, value) for every labelled series."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield '', key, value
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram, as Prometheus expects."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            series['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            series['sum'] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with-block takes, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(series['counts']), series['sum']) for key, series in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield '_bucket', key + (('le', format_value(float(bound))),), cumulative
+            yield '_sum', key, total
+            yield '_count', key, cumulative
+
+
+class MetricsRegistry:
+    """The metrics one process exposes on /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collect):
+        """Add a callback that returns metrics built fresh at each scrape."""
+        self._collectors.append(collect)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        metrics = list(self._metrics)
+        for collect in self._collectors:
+            try:
+                metrics.extend(collect())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,179 @@
+"""
+Poll Scheduler - rate-limit-aware adaptive polling for the Bitcoin X Feed
+
+RateLimitTracker remembers the x-rate-limit-* headers the API returns for each
+endpoint. PollScheduler learns how often each account posts and decides which
+accounts a refresh should poll, spending the remaining quota where new tweets
+are most likely and backing off as the quota runs low.
+"""
+
+import math
+import re
+import threading
+import time
+
+_ID_SEGMENT = re.compile(r'(?<=.)/\d+(?=/|$)')  # numeric path segments, not the leading /2 version
+
+
+def endpoint_key(route):
+    """Collapse ids in an API route so all calls to one endpoint share a key."""
+    return _ID_SEGMENT.sub('/:id', route.split('?', 1)[0])
+
+
+class RateLimitTracker:
+    """Latest quota (limit, remaining, reset) reported for each API endpoint."""
+
+    def __init__(self):
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, headers):
+        """Store the rate-limit headers from a response to route, if present."""
+        try:
+            limit = int(headers['x-rate-limit-limit'])
+            remaining = int(headers['x-rate-limit-remaining'])
+            reset = int(headers['x-rate-limit-reset'])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self._limits[endpoint_key(route)] = (limit, remaining, reset)
+
+    def get(self, endpoint, now=None):
+        """Return (limit, remaining, reset) for endpoint, or None if unknown.
+
+        Once the reset time has passed the window is assumed to be full again.
+        """
+        with self._lock:
+            quota = self._limits.get(endpoint)
+        if quota is None:
+            return None
+        limit, remaining, reset = quota
+        if (now or time.time()) >= reset:
+            return (limit, limit, reset)
+        return quota
+
+    def headroom(self, endpoint, now=None):
+        """Return the fraction of the endpoint's quota left (1.0 if unknown)."""
+        quota = self.get(endpoint, now)
+        if quota is None or quota[0] <= 0:
+            return 1.0
+        return quota[1] / quota[0]
+
+    def snapshot(self, now=None):
+        """Return {endpoint: {limit, remaining, reset, headroom}} for reporting."""
+        with self._lock:
+            endpoints = list(self._limits)
+        report = {}
+        for endpoint in endpoints:
+            limit, remaining, reset = self.get(endpoint, now)
+            report[endpoint] = {
+                'limit': limit,
+                'remaining': remaining,
+                'reset': reset,
+                'headroom': round(remaining / limit, 3) if limit else 1.0
+            }
+        return report
+
+
+class PollScheduler:
+    """Chooses which accounts to poll on each refresh.
+
+    Each account's posting rate is an exponentially weighted average of the new
+    tweets seen per second between polls, and its poll interval aims for about
+    target_new_tweets new tweets per poll within [min_interval, max_interval].
+    Intervals stretch as the endpoint's headroom falls below half, and each
+    refresh spends at most its share of the quota left in the current window,
+    keeping `reserve` of the limit back, on the accounts most likely to have
+    posted.
+    """
+
+    def __init__(self, endpoint, min_interval, max_interval, refresh_interval,
+                 target_new_tweets=1.0, smoothing=0.3, reserve=0.1):
+        self.endpoint = endpoint
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.refresh_interval = refresh_interval
+        self.target_new_tweets = target_new_tweets
+        self.smoothing = smoothing
+        self.reserve = reserve
+        self._accounts = {}  # username -> {'rate': tweets/second, 'last_poll': epoch}
+        self._lock = threading.Lock()
+
+    def interval(self, username, headroom=1.0):
+        """Return how long to wait between polls of username at the given headroom."""
+        with self._lock:
+            state = self._accounts.get(username)
+        if state is None:
+            return 0
+        if state['rate'] > 0:
+            interval = self.target_new_tweets / state['rate']
+        else:
+            interval = self.max_interval
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        if headroom < 0.5:
+            interval = min(self.max_interval, interval / max(headroom * 2, 0.1))
+        return interval
+
+    def select(self, usernames, rate_limits, now=None):
+        """Return the accounts to poll now, most likely to have new tweets first."""
+        now = now or time.time()
+        headroom = rate_limits.headroom(self.endpoint, now)
+
+        due = []
+        for username in usernames:
+            with self._lock:
+                state = self._accounts.get(username)
+            if state is None:
+                # Never polled: highest priority
+                due.append((math.inf, username))
+                continue
+            # Due if it would be overdue before the next refresh is halfway through
+            elapsed = now - state['last_poll']
+            if elapsed + self.refresh_interval / 2 >= self.interval(username, headroom):
+                due.append((state['rate'] * elapsed, username))
+
+        due.sort(key=lambda item: item[0], reverse=True)
+        budget = self.budget(rate_limits, now)
+        if budget is not None:
+            due = due[:budget]
+        return [username for _, username in due]
+
+    def budget(self, rate_limits, now=None):
+        """Return how many polls this refresh may spend, or None if the quota is unknown."""
+        now = now or time.time()
+        quota = rate_limits.get(self.endpoint, now)
+        if quota is None:
+            return None
+        limit, remaining, reset = quota
+        spendable = max(0, remaining - math.ceil(limit * self.reserve))
+        refreshes_left = max(1.0, (reset - now) / self.refresh_interval)
+        return math.ceil(spendable / refreshes_left)
+
+    def record_poll(self, username, new_tweets, now=None):
+        """Update username's posting rate after a poll that returned new_tweets tweets."""
+        now = now or time.time()
+        with self._lock:
+            state = self._accounts.get(username)
+            if state is None:
+                # Start by assuming the account is busy; quiet accounts decay towards max_interval
+                self._accounts[username] = {'rate': self.target_new_tweets / self.min_interval, 'last_poll': now}
+                return
+            elapsed = max(1.0, now - state['last_poll'])
+            observed = new_tweets / elapsed
+            state['rate'] = self.smoothing * observed + (1 - self.smoothing) * state['rate']
+            state['last_poll'] = now
+
+    def snapshot(self):
+        """Return {username: {rate_per_hour, last_poll, interval}} for reporting."""
+        with self._lock:
+            usernames = list(self._accounts)
+        report = {}
+        for username in usernames:
+            with self._lock:
+                state = dict(self._accounts[username])
+            report[username] = {
+                'rate_per_hour': round(state['rate'] * 3600, 3),
+                'last_poll': state['last_poll'],
+                'interval': round(self.interval(username), 1)
+            }
+        return report
@@ -0,0 +1,113 @@
+"""
+Request Profiler - opt-in per-stage timings and slow request profiles
+
+A RequestTrace collects how long each stage of a request took (upstream calls,
+media expansion, merging, serialization ...) and renders them as a
+Server-Timing header. Code marks its stages with `with stage('name'):`, which
+costs a single context variable lookup when the request isn't being traced.
+
+Stages run on fetch worker threads too: submit work with
+contextvars.copy_context().run so the workers record into the request's trace.
+Durations from parallel workers are summed, so a stage can exceed wall time.
+
+ProfileRing keeps the cProfile output of the slowest requests in a bounded
+directory on disk, deleting the oldest dumps first.
+"""
+
+import contextvars
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+_current_trace = contextvars.ContextVar('request_trace', default=None)
+
+
+class RequestTrace:
+    """Stage timings for one traced request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}  # name -> [total seconds, count], in the order stages started
+        self._lock = threading.Lock()
+
+    def begin(self, name):
+        """Reserve name's place so stages are listed in the order they started."""
+        with self._lock:
+            self.stages.setdefault(name, [0.0, 0])
+
+    def record(self, name, seconds):
+        with self._lock:
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Return the Server-Timing header value (milliseconds), ending with the total."""
+        with self._lock:
+            stages = [(name, seconds, count) for name, (seconds, count) in self.stages.items()]
+        entries = []
+        for name, seconds, count in stages:
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ', '.join(entries)
+
+
+def start_trace():
+    """Start tracing the current context; returns a token for end_trace."""
+    return _current_trace.set(RequestTrace())
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Record the with-block's duration as stage name of the current trace, if any."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    trace.begin(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(name, time.perf_counter() - start)
+
+
+class ProfileRing:
+    """Directory holding at most limit .prof dumps (pstats format), newest kept."""
+
+    def __init__(self, directory, limit):
+        self.directory = directory
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+
+    def save(self, profile, label):
+        """Write profile's stats as a new dump and drop the oldest beyond limit; return its path."""
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')[:60] or 'request'
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{time.time_ns()}-{slug}.prof")
+            profile.dump_stats(path)
+
+            dumps = sorted(name for name in os.listdir(self.directory) if name.endswith('.prof'))
+            for name in dumps[:-self.limit]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        return path
@@ -2,10 +2,20 @@
 Twitter Feed Application Launcher
 
 This script runs the Flask application that displays tweets from Bitcoin influencers.
+With --production (or PRODUCTION=1) it serves the X feed app instead, without the
+debugger or reloader and with its cache loaded before the first request, from
+the last shared snapshot (SHARED_CACHE_BACKEND) or else the tweet store.
 """
 
-from twitter_feed import app
+import os
+import sys
 
 if __name__ == "__main__":
-    # Run the Flask app
-    app.run(host='0.0.0.0', port=3000, debug=True)
\ No newline at end of file
+    if '--production' in sys.argv or os.getenv('PRODUCTION') == '1':
+        from x_bitcoin_feed import serve
+        serve(host='0.0.0.0', port=int(os.getenv('PORT', '3000')))
+    else:
+        from twitter_feed import app
+
+        # Run the Flask app
+        app.run(host='0.0.0.0', port=3000, debug=True)
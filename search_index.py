@@ -0,0 +1,195 @@
+"""
+Search Index - inverted index over cached tweets for /tweets/search
+
+Maps each term to the ids of the tweets containing it. Words are indexed in
+lowercase, and #hashtags, $cashtags and @mentions are indexed both with their
+prefix and as plain words, so `bitcoin` matches "#Bitcoin" while `#bitcoin`
+matches only the hashtag.
+
+Queries are in disjunctive normal form: space-separated terms must all match
+and `OR` separates alternatives, e.g. `etf inflows OR $ibit`. Matching only
+touches the postings of the query terms, never the whole corpus.
+"""
+
+import bisect
+import heapq
+import itertools
+import re
+import threading
+
+_TERM = re.compile(r'[#$@]?\w+', re.UNICODE)
+_PREFIXES = '#$@'
+
+SORT_ORDERS = ('engagement', 'recent')
+
+
+def tokenize(text):
+    """Return the set of index terms in text."""
+    terms = set()
+    for match in _TERM.findall(text.lower()):
+        terms.add(match)
+        if match[0] in _PREFIXES and len(match) > 1:
+            terms.add(match[1:])
+    return terms
+
+
+def parse_query(query):
+    """Return the query as a list of OR'ed groups, each a list of AND'ed terms."""
+    groups = []
+    for part in re.split(r'\s+OR\s+', query.strip()):
+        terms = [match.lower() for match in _TERM.findall(part)]
+        if terms:
+            groups.append(terms)
+    return groups
+
+
+def _newest_first(tweet):
+    """Bisect key for a newest-first list: -created_ts ascends along it."""
+    return -tweet.created_ts
+
+
+def engagement_score(tweet):
+    """Rank by engagement: retweets and replies count for more than likes."""
+    return tweet.like_count + 2 * tweet.retweet_count + 3 * tweet.reply_count
+
+
+class TweetSearchIndex:
+    """Inverted index kept in step with the tweet cache, safe to query while it is updated.
+
+    Alongside the postings it keeps the indexed tweets newest first (so time
+    ranges are a bisect on created_ts) and, built lazily after each sync,
+    ranked by engagement. Broad queries walk these orderings and stop after
+    `limit` hits instead of ranking every match.
+    """
+
+    # Rank at most this many filtered matches directly; beyond it, walk an ordering
+    DIRECT_RANK_LIMIT = 1000
+
+    def __init__(self):
+        self._postings = {}  # term -> set of tweet ids
+        self._docs = {}  # tweet id -> Tweet
+        self._timelines = {}  # username -> the timeline indexed for it at the last sync
+        self._by_recent = []  # Tweets, newest first
+        self._by_engagement = None  # Tweets, most engagement first (built on demand)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _index(self, tweet):
+        for term in tokenize(tweet.text):
+            self._postings.setdefault(term, set()).add(tweet.id)
+
+    def _unindex(self, tweet):
+        for term in tokenize(tweet.text):
+            ids = self._postings.get(term)
+            if ids is not None:
+                ids.discard(tweet.id)
+                if not ids:
+                    del self._postings[term]
+
+    def sync(self, tweets, by_user):
+        """Make the index hold exactly tweets (newest first, as in tweet_cache).
+
+        by_user is the same tweets per account. An account whose timeline is
+        the same list object as at the last sync is skipped, so after a sharded
+        refresh only the refetched accounts are compared. Of those, only tweets
+        that were added or evicted are tokenized; the rest just take the new
+        objects, with fresher metrics. Tweet text never changes for an id
+        (edits get new ids). tweets is kept as is, so it must not be modified.
+        """
+        with self._lock:
+            docs = self._docs
+            previous = self._timelines
+            for username in previous.keys() - by_user.keys():
+                for tweet in previous[username]:
+                    self._unindex(tweet)
+                    docs.pop(tweet.id, None)
+            for username, timeline in by_user.items():
+                old = previous.get(username)
+                if old is timeline:
+                    continue
+                old_docs = {tweet.id: tweet for tweet in old} if old else {}
+                new_docs = {tweet.id: tweet for tweet in timeline}
+                for tweet_id in old_docs.keys() - new_docs.keys():
+                    self._unindex(old_docs[tweet_id])
+                    docs.pop(tweet_id, None)
+                for tweet_id in new_docs.keys() - old_docs.keys():
+                    self._index(new_docs[tweet_id])
+                docs.update(new_docs)
+            self._timelines = dict(by_user)
+            self._by_recent = tweets
+            self._by_engagement = None
+
+    def _match(self, groups):
+        """Return the ids matching any group, intersecting the smallest postings first.
+
+        The result may be a postings set itself, so it must not be modified.
+        """
+        matched = set()
+        for terms in groups:
+            postings = [self._postings.get(term) for term in set(terms)]
+            if not all(postings):
+                continue
+            postings.sort(key=len)
+            ids = postings[0]
+            for other in postings[1:]:
+                ids = ids & other
+                if not ids:
+                    break
+            matched = ids if not matched else matched | ids
+        return matched
+
+    def search(self, query, limit, since=None, until=None, usernames=None, sort='engagement'):
+        """Return (total matches, up to limit matching Tweets) for query.
+
+        since/until bound created_ts (epoch seconds, inclusive); usernames limits
+        the authors. Results are ranked by engagement or newest first.
+        """
+        groups = parse_query(query)
+        authors = set(usernames) if usernames else None
+        with self._lock:
+            matched = self._match(groups)
+            if not matched:
+                return 0, []
+
+            # Tweets inside the time range are a contiguous slice of the newest-first list
+            by_recent = self._by_recent
+            lo = 0 if until is None else bisect.bisect_left(by_recent, -until, key=_newest_first)
+            hi = len(by_recent) if since is None else bisect.bisect_right(by_recent, -since, key=_newest_first)
+            window = by_recent[lo:hi] if (lo, hi) != (0, len(by_recent)) else by_recent
+            filtered = since is not None or until is not None or authors is not None
+
+            def accept(tweet):
+                return (tweet.id in matched
+                        and (since is None or tweet.created_ts >= since)
+                        and (until is None or tweet.created_ts <= until)
+                        and (authors is None or tweet.username in authors))
+
+            # Walk whichever is smaller: the matches or the time window
+            if len(window) < len(matched):
+                source = window
+            elif filtered or len(matched) <= self.DIRECT_RANK_LIMIT:
+                docs = self._docs
+                source = [docs[tweet_id] for tweet_id in matched]
+            else:
+                source = None  # unfiltered broad query: only the ordering walk below is needed
+            total = sum(1 for tweet in source if accept(tweet)) if filtered else len(matched)
+
+            if sort == 'recent':
+                key = lambda tweet: tweet.sort_key
+            else:
+                key = lambda tweet: (engagement_score(tweet), tweet.sort_key)
+
+            if total <= self.DIRECT_RANK_LIMIT:
+                top = heapq.nlargest(limit, (tweet for tweet in source if accept(tweet)), key=key)
+            else:
+                if sort == 'recent':
+                    ordering = window
+                else:
+                    if self._by_engagement is None:
+                        # Stable sort of the newest-first list: ties stay newest first
+                        self._by_engagement = sorted(self._by_recent, key=engagement_score, reverse=True)
+                    ordering = self._by_engagement
+                top = list(itertools.islice((tweet for tweet in ordering if accept(tweet)), limit))
+        return total, top
@@ -0,0 +1,263 @@
+"""
+Shared Cache - one feed snapshot shared by every worker process
+
+Under a multi-worker server each process would otherwise keep its own cache and
+refresh it from the API on its own, multiplying API usage by the worker count.
+Instead one worker, elected by holding an exclusive lock on a file, refreshes
+and publishes each snapshot to a SnapshotBackend; the other workers poll the
+backend's version and adopt a snapshot when it changes. If the leader exits its
+lock is released and the next worker to try it takes over.
+
+A snapshot is a single blob: a fixed prefix (magic and version), a small JSON
+header, then raw sections such as the pre-serialized first page and its
+compressed variants. Readers slice sections straight out of the blob, so the
+first page is served as published, never decoded and re-encoded.
+
+Backends:
+- 'mmap': a snapshot file replaced atomically by the leader and memory-mapped
+  by readers, so every worker shares the same page-cache copy
+- 'sqlite': a one-row table, for deployments that already share a database
+
+Anything with an atomic set and a cheap version read (e.g. a local Redis) fits
+the same version/read/write interface; add it to BACKENDS.
+"""
+
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+# fcntl is POSIX only; without it every worker leads (each keeps refreshing on its own)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+MAGIC = b'BXF1'
+PREFIX = struct.Struct('<4sQI')  # magic, version, header length
+
+
+def encode_snapshot(version, meta, sections):
+    """Return the blob for a snapshot: prefix, JSON header (meta and section layout), sections."""
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        layout[name] = [offset, len(data)]
+        offset += len(data)
+    header = json.dumps({'meta': meta, 'sections': layout}, separators=(',', ':')).encode('utf-8')
+    return b''.join([PREFIX.pack(MAGIC, version, len(header)), header, *sections.values()])
+
+
+class SharedSnapshot:
+    """A published snapshot blob (bytes or an mmap); sections are read on demand."""
+
+    def __init__(self, buffer):
+        magic, self.version, header_size = PREFIX.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a feed snapshot")
+        start = PREFIX.size
+        header = json.loads(buffer[start:start + header_size])
+        self.meta = header['meta']
+        self.buffer = buffer
+        self._base = start + header_size
+        self._layout = header['sections']
+
+    def __contains__(self, name):
+        return name in self._layout
+
+    def section(self, name):
+        """Return a section's bytes."""
+        offset, size = self._layout[name]
+        start = self._base + offset
+        return self.buffer[start:start + size]
+
+
+class SnapshotBackend(ABC):
+    """Where the leader publishes snapshots and the other workers read them."""
+
+    @abstractmethod
+    def version(self):
+        """Return the published snapshot's version, or None. Polled often, so it must be cheap."""
+
+    @abstractmethod
+    def read(self):
+        """Return the published SharedSnapshot, or None."""
+
+    @abstractmethod
+    def write(self, version, blob):
+        """Atomically replace the published snapshot with blob."""
+
+
+class MmapSnapshotBackend(SnapshotBackend):
+    """Snapshot file replaced with an atomic rename and memory-mapped by readers.
+
+    A reader keeps its mapping of the old file until it reads the new one, so a
+    replacement never changes bytes under a snapshot that is being served.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._identity = None  # (inode, mtime, size) of the mapped file
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _identity_of(st):
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def version(self):
+        try:
+            identity = self._identity_of(os.stat(self.path))
+        except FileNotFoundError:
+            return None
+        snapshot = self._snapshot
+        if identity == self._identity and snapshot is not None:
+            return snapshot.version
+        with open(self.path, 'rb') as f:
+            prefix = f.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            return None
+        return PREFIX.unpack(prefix)[1]
+
+    def read(self):
+        with self._lock:
+            try:
+                f = open(self.path, 'rb')
+            except FileNotFoundError:
+                return None
+            with f:
+                st = os.fstat(f.fileno())
+                identity = self._identity_of(st)
+                if identity != self._identity:
+                    if st.st_size < PREFIX.size:
+                        return None
+                    self._snapshot = SharedSnapshot(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                    self._identity = identity
+            return self._snapshot
+
+    def write(self, version, blob):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class SqliteSnapshotBackend(SnapshotBackend):
+    """Snapshot kept in a one-row SQLite table (WAL, so readers never block the writer)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS feed_snapshot ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL, data BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def version(self):
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM feed_snapshot WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    def read(self):
+        version = self.version()
+        if version is None:
+            return None
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM feed_snapshot WHERE id = 1").fetchone()
+        if row is None:
+            return None
+        self._snapshot = SharedSnapshot(row[0])
+        return self._snapshot
+
+    def write(self, version, blob):
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO feed_snapshot (id, version, data) VALUES (1, ?, ?)",
+                    (version, blob)
+                )
+
+
+BACKENDS = {
+    'mmap': MmapSnapshotBackend,
+    'sqlite': SqliteSnapshotBackend,
+}
+
+
+class LeaderLock:
+    """Exclusive, non-blocking lock on a file; held until the process exits."""
+
+    def __init__(self, path):
+        self.path = path
+        self.held = False
+        self._file = None
+
+    def try_acquire(self):
+        """Take the lock if it is free; return whether this process holds it."""
+        if self.held:
+            return True
+        if not FCNTL_AVAILABLE:
+            self.held = True
+            return True
+        f = open(self.path, 'a')
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f  # closing the file would release the lock
+        self.held = True
+        return True
+
+
+class SharedCache:
+    """A snapshot backend plus the leader election deciding which worker writes to it."""
+
+    def __init__(self, backend, path):
+        self.name = backend
+        try:
+            self.backend = BACKENDS[backend](path)
+        except KeyError:
+            raise ValueError(f"Unknown shared cache backend {backend!r}; use one of: {', '.join(BACKENDS)}")
+        self.leader = LeaderLock(f"{path}.lock")
+
+    @property
+    def is_leader(self):
+        return self.leader.held
+
+    def try_lead(self):
+        """Become the leader if no other worker is; return whether this worker leads."""
+        return self.leader.try_acquire()
+
+    def publish(self, version, meta, sections):
+        """Publish a snapshot (leader only)."""
+        self.backend.write(version, encode_snapshot(version, meta, sections))
+
+    def latest(self, known_version):
+        """Return the published snapshot if its version differs from known_version, else None."""
+        version = self.backend.version()
+        if version is None or version == known_version:
+            return None
+        return self.backend.read()
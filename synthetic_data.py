@@ -0,0 +1,229 @@
+"""
+Synthetic Data - deterministic tweet generator for mock mode and load testing
+
+Generates realistic-looking timelines for any number of accounts from a seed:
+posting times follow a per-account Poisson process with a daily cycle, metrics
+are heavy-tailed and scale with each account's popularity, and some tweets carry
+media. Ids are Twitter-style snowflakes: the tweet's second, then a slot picked
+by a stable hash of the username in the bits below it. Each account posts at
+most once a second, so its ids never repeat, and accounts generated together
+are given distinct slots, so their ids don't collide either. The same seed
+always yields the same tweets and ids.
+
+Output is streamed as a generator, so millions of tweets can drive the cache,
+sort and serialization paths without being held in memory at once.
+
+Usage: python synthetic_data.py ACCOUNTS TWEETS_PER_ACCOUNT [SEED] > tweets.jsonl
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import random
+import sys
+import time
+
+from tweet_model import Tweet
+
+# Known accounts and the kind of things they post
+MOCK_TWEET_CONTENT = {
+    'saylor': [
+        "Bitcoin is digital energy. Energy is the fundamental unit of the physical universe. #Bitcoin is the fundamental unit of the monetary universe.",
+        "There is no second best. #Bitcoin is the apex digital monetary asset of the human race.",
+        "If you're going to invest in Bitcoin, a long time horizon is advantageous. I recommend a century.",
+        "$BTC is hope for billions of people that need a treasury that cannot be debased or seized.",
+        "The network effect of #Bitcoin increases with each new hodler. The future is digital gold."
+    ],
+    'martypartymusic': [
+        "The beauty of Bitcoin is that it empowers individuals to be their own bank. No trust necessary. #BTCRevolution",
+        "Just stacked more sats! Dollar cost averaging into #Bitcoin is the way. Keep building your position in sound money.",
+        "People still don't realize how early we are in the Bitcoin adoption curve. Less than 2% global penetration.",
+        "The Bitcoin halving is going to shock everyone who's not prepared. Supply shock incoming!",
+        "True financial freedom comes from holding your own keys and being sovereign. Not your keys, not your coins. #Bitcoin"
+    ],
+    'RaoulGMI': [
+        "Bitcoin and digital assets are the greatest growth opportunity of our lifetime. The upside is almost unquantifiable.",
+        "Institutions are slowly realizing that they can't afford NOT to have Bitcoin in their portfolios. The Great Reallocation is coming.",
+        "Smart money is already positioned for the next leg up in Bitcoin. Are you?",
+        "The bitcoin network is becoming the world's most secure and valuable consensus network. The implications are enormous.",
+        "Liquidity drives all asset prices. And the bitcoin liquidity structure is extremely bullish right now."
+    ],
+    'Excellion': [
+        "Layer 2 solutions will bring Bitcoin to billions. The base layer must remain simple and secure.",
+        "Nation state Bitcoin adoption is happening faster than anyone expected. Game theory in action.",
+        "Mining with renewable energy is the future of #Bitcoin - abundant energy creating sound money.",
+        "Don't trust, verify. Run a node. Be sovereign. This is the way. #Bitcoin",
+        "As fiat currencies continue to be debased, Bitcoin continues to shine as the hardest money ever created."
+    ],
+    'BitcoinMagazine': [
+        "BREAKING: Major European bank launches Bitcoin custody services for institutional clients.",
+        "10 years ago today, Bitcoin was trading at $250. Today it's over $100,000.",
+        "El Salvador's Bitcoin strategy proves successful as tourism increases 30% year over year.",
+        "MicroStrategy announces acquisition of an additional 8,420 BTC, bringing total holdings to over 200,000 bitcoin.",
+        "New data from Glassnode shows Bitcoin illiquid supply has reached an all-time high of 78% of circulating supply."
+    ],
+    'rektcapital': [
+        "Bitcoin is looking incredibly strong on the Monthly chart. Higher lows pattern intact on the uptrend.",
+        "#BTC price confirmed a breakout from this multi-month structure. Target: $125,000",
+        "The $BTC Fear & Greed Index is showing Extreme Greed. Be cautious short-term, but the macro bull market remains intact.",
+        "The weekly RSI on Bitcoin is NOT in overbought territory yet. Still room to grow in this rally.",
+        "Bitcoin's new All-Time High will catch many investors off guard who've been waiting for a bigger dip to buy."
+    ],
+    'APompliano': [
+        "Bitcoin is the only truly scarce digital asset. Everything else can be replicated, copied, or outdated.",
+        "The Lightning Network is growing exponentially. Bitcoin as a payment network is now a reality.",
+        "More than 250 million people now have exposure to Bitcoin through ETFs. Mass adoption is coming.",
+        "The Federal Reserve continues to destroy the value of the dollar. Bitcoin fixes this.",
+        "Prediction: Bitcoin will be recognized as the global reserve asset by 2030."
+    ],
+    'BTC_Archive': [
+        "JUST IN: Switzerland approves new Bitcoin spot ETF, opening doors for broader European adoption.",
+        "BREAKING: Major sovereign wealth fund reveals 1% allocation to Bitcoin, worth over $5 billion.",
+        "Bitcoin miners earned over $45 million in a single day - a new all-time high.",
+        "This chart shows Bitcoin adoption is growing faster than the internet did in the 1990s.",
+        "Over 85% of the Bitcoin supply hasn't moved in the last 3 months. Hodlers are staying strong."
+    ]
+}
+
+# Default content for any username not in our predefined list
+DEFAULT_TWEET_CONTENT = [
+    "Bitcoin is the future of money. The revolution continues. #BTC",
+    "Just added more Bitcoin to my long-term holdings. You should too.",
+    "The fundamentals of Bitcoin have never been stronger.",
+    "HODL and prosper. This is financial freedom.",
+    "Sound money for a digital age. Bitcoin is inevitable."
+]
+
+HASHTAGS = ['#Bitcoin', '#BTC', '#HODL', '#Lightning', '#SoundMoney', '#Mining']
+CASHTAGS = ['$BTC', '$MSTR', '$COIN', '$IBIT']
+
+TWITTER_EPOCH_MS = 1288834974657  # snowflake epoch (2010-11-04)
+DEFAULT_SEED = 21_000_000
+
+
+# Ids available within one second: the milliseconds (timestamps are whole seconds)
+# plus the 22 worker and sequence bits below them
+SLOTS_PER_SECOND = 1000 << 22
+
+
+def snowflake_id(created_ts, slot):
+    """Build a Twitter-style snowflake id for a tweet posted at created_ts (epoch seconds)."""
+    return ((created_ts * 1000 - TWITTER_EPOCH_MS) << 22) + slot
+
+
+def account_slot(username):
+    """Return a stable id slot for an account, from a hash of its (case-insensitive) username."""
+    digest = hashlib.blake2b(username.lower().encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % SLOTS_PER_SECOND
+
+
+def account_slots(accounts):
+    """Return {username: slot} with a distinct slot for every account.
+
+    Each account keeps its account_slot unless an earlier account already has
+    it; then it takes the next free one.
+    """
+    slots = {}
+    taken = set()
+    for username in accounts:
+        slot = account_slot(username)
+        while slot in taken:
+            slot = (slot + 1) % SLOTS_PER_SECOND
+        taken.add(slot)
+        slots[username] = slot
+    return slots
+
+
+def synthetic_accounts(count):
+    """Return count account names: the known influencers first, then generated ones."""
+    known = list(MOCK_TWEET_CONTENT)
+    generated = (f"btc_account_{i:05d}" for i in itertools.count(1))
+    return (known + list(itertools.islice(generated, max(0, count - len(known)))))[:count]
+
+
+def diurnal_weight(created_ts):
+    """Relative posting activity by UTC hour: quiet overnight, busiest mid-afternoon."""
+    hour = (created_ts % 86400) / 3600
+    return 0.25 + 0.75 * (1 + math.cos((hour - 15) * math.pi / 12)) / 2
+
+
+def iter_account_tweets(username, count, seed=DEFAULT_SEED, end_ts=None, slot=None):
+    """Yield count Tweets for one account, newest first, ending at end_ts.
+
+    The same (username, seed, end_ts) always yields the same tweets. Tweets are
+    at least a second apart, so ids built from one slot (account_slot(username)
+    by default) are unique however many tweets are generated.
+    """
+    end_ts = int(end_ts if end_ts is not None else time.time())
+    if slot is None:
+        slot = account_slot(username)
+    rng = random.Random(f"{seed}:{username}")
+    contents = MOCK_TWEET_CONTENT.get(username, DEFAULT_TWEET_CONTENT)
+
+    # Per-account traits: posting rate (tweets/hour) and audience size
+    rate_per_hour = min(20.0, max(0.05, rng.lognormvariate(0.0, 1.0)))
+    popularity = rng.lognormvariate(8.0, 1.0)
+
+    created_ts = end_ts
+    for _ in range(count):
+        # Walk back in time with exponential gaps, shorter during busy hours
+        gap = rng.expovariate(rate_per_hour / 3600) / diurnal_weight(created_ts)
+        created_ts -= max(1, int(gap))
+
+        text = rng.choice(contents)
+        if rng.random() < 0.3:
+            text = f"{text} {rng.choice(HASHTAGS)}"
+        if rng.random() < 0.15:
+            text = f"{text} {rng.choice(CASHTAGS)}"
+
+        like_count = int(rng.lognormvariate(math.log(popularity * 0.05), 1.0))
+        tweet_id = snowflake_id(created_ts, slot)
+        media_urls = [f"https://pbs.twimg.com/media/{tweet_id}.jpg"] if rng.random() < 0.2 else []
+
+        yield Tweet.create(
+            id=tweet_id,
+            text=text,
+            created_at=created_ts,
+            username=username,
+            metrics={
+                'like_count': like_count,
+                'retweet_count': int(like_count * rng.uniform(0.05, 0.25)),
+                'reply_count': int(like_count * rng.uniform(0.02, 0.1))
+            },
+            media_urls=media_urls
+        )
+
+
+def iter_synthetic_tweets(accounts, tweets_per_account, seed=DEFAULT_SEED, end_ts=None):
+    """Yield tweets_per_account Tweets for each account, one account (newest first) at a time.
+
+    accounts is a list of usernames or a number of accounts to generate.
+    """
+    if isinstance(accounts, int):
+        accounts = synthetic_accounts(accounts)
+    end_ts = int(end_ts if end_ts is not None else time.time())
+    for username, slot in account_slots(accounts).items():
+        yield from iter_account_tweets(username, tweets_per_account, seed, end_ts, slot)
+
+
+def synthetic_timelines(accounts, tweets_per_account, seed=DEFAULT_SEED, end_ts=None):
+    """Return {username: timeline (newest first)}, the shape fetch_accounts_concurrently returns."""
+    if isinstance(accounts, int):
+        accounts = synthetic_accounts(accounts)
+    end_ts = int(end_ts if end_ts is not None else time.time())
+    return {
+        username: list(iter_account_tweets(username, tweets_per_account, seed, end_ts, slot))
+        for username, slot in account_slots(accounts).items()
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        sys.exit(1)
+    account_count = int(sys.argv[1])
+    per_account = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_SEED
+    for tweet in iter_synthetic_tweets(account_count, per_account, seed):
+        sys.stdout.write(json.dumps(tweet.to_json()) + "\n")
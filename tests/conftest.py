@@ -0,0 +1,94 @@
+"""
+Shared fixtures - the feed module with fresh state, and a fake Twitter API it can call
+
+The environment is set before x_bitcoin_feed is first imported, so the app runs
+without a tweet store, shared cache, background refresher or API credentials
+unless a test asks for them.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_state_dir = tempfile.mkdtemp(prefix='x-feed-tests-')
+os.environ.update(
+    TWEET_DB_PATH='',
+    SHARED_CACHE_BACKEND='',
+    BACKGROUND_REFRESH='0',
+    USER_ID_CACHE_FILE=os.path.join(_state_dir, 'user_ids.json'),
+    ACCOUNTS_FILE=os.path.join(_state_dir, 'accounts.txt'),
+)
+os.environ.pop('TWITTER_BEARER_TOKEN', None)
+os.environ.pop('TWITTER_API_BASE_URL', None)
+
+
+class FakeClock:
+    """A clock the fake API reads instead of time.time, moved on by the test."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    """x_bitcoin_feed with an empty cache, no since_ids and every account due for polling."""
+    import x_bitcoin_feed as feed
+    from poll_scheduler import PollScheduler, RateLimitTracker
+    from search_index import TweetSearchIndex
+
+    for name, value in {
+        'tweet_cache': [],
+        'tweets_by_user': {},
+        'page_indexes': {},
+        'current_snapshot': None,
+        'search_index': TweetSearchIndex(),
+        'last_fetch_time': 0,
+        'refresh_cycle': 0,
+        'engagement_columns': None,
+        'engagement_version': None,
+        'rate_limits': RateLimitTracker(),
+        'poll_scheduler': PollScheduler(feed.TIMELINE_ENDPOINT, min_interval=1, max_interval=1,
+                                        refresh_interval=10),
+    }.items():
+        monkeypatch.setattr(feed, name, value)
+    for name in ('account_fetch_times', 'account_timelines', 'since_ids', 'user_id_cache',
+                 '_mock_timelines', '_analytics_cache'):
+        monkeypatch.setattr(feed, name, {})
+    yield feed
+
+
+@pytest.fixture
+def fake_api(feed, monkeypatch, request):
+    """A fake Twitter API on a local port with a FakeClock, and the feed pointed at it.
+
+    Parametrize it indirectly with a dict to override FakeTwitterApi arguments.
+    """
+    from fake_twitter_api import FakeTwitterApi, serve_in_thread
+
+    options = dict(seed=7, tweets_per_account=400, live_window=3600, latency=0,
+                   error_rate=0, rate_429=0, rate_limits={
+                       '/2/users/by': 10 ** 9,
+                       '/2/users/by/username/:username': 10 ** 9,
+                       '/2/users/:id/tweets': 10 ** 9,
+                   })
+    options.update(getattr(request, 'param', {}))
+    api = FakeTwitterApi(clock=FakeClock(1_750_000_000), **options)
+    server, base_url = serve_in_thread(api)
+    monkeypatch.setattr(feed, 'TWITTER_BEARER_TOKEN', 'test')
+    monkeypatch.setattr(feed, 'TWITTER_API_BASE_URL', base_url)
+    monkeypatch.setattr(feed, 'twitter_client', None)
+    try:
+        yield api
+    finally:
+        server.shutdown()
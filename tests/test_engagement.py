@@ -0,0 +1,165 @@
+"""
+Engagement tests - statistics checked against hand-computed values, and columns built from a published snapshot
+"""
+
+import time
+
+from engagement import EngagementColumns, account_stats, percentiles, rolling_windows, top_tweets
+from tweet_model import Tweet
+
+END_TS = 1_750_000_000
+
+
+def timelines():
+    """Two accounts and an empty one. Engagement is likes + 2 * retweets + 3 * replies."""
+    return {
+        'alice': [
+            Tweet('13', 'a3', END_TS + 7200, 'alice', 16, 0, 0),  # 16
+            Tweet('12', 'a2', END_TS + 3600, 'alice', 4, 1, 1),  # 9
+            Tweet('11', 'a1', END_TS, 'alice', 0, 0, 0),  # 0
+        ],
+        'bob': [
+            Tweet('22', 'b2', END_TS + 7000, 'bob', 1, 2, 0),  # 5
+            Tweet('21', 'b1', END_TS + 100, 'bob', 1, 3, 1),  # 10
+        ],
+        'carol': [],
+    }
+
+
+def test_columns_follow_timeline_order():
+    columns = EngagementColumns(timelines())
+    assert columns.usernames == ['alice', 'bob']
+    assert len(columns) == 5
+    assert columns.engagement.tolist() == [16, 9, 0, 5, 10]
+    assert columns.account.tolist() == [0, 0, 0, 1, 1]
+    assert columns.ids.tolist() == [13, 12, 11, 22, 21]
+
+
+def test_account_stats():
+    assert account_stats(EngagementColumns(timelines())) == [
+        {
+            'username': 'alice', 'tweets': 3, 'likes': 20, 'retweets': 1, 'replies': 1,
+            'engagement': 25, 'engagement_per_tweet': 8.33, 'median_engagement': 9.0,
+            'engagement_share': 0.625,
+            'tweets_per_day': 36.0,  # 3 tweets over the 7200 s from alice's first tweet to the newest
+        },
+        {
+            'username': 'bob', 'tweets': 2, 'likes': 2, 'retweets': 5, 'replies': 1,
+            'engagement': 15, 'engagement_per_tweet': 7.5, 'median_engagement': 7.5,
+            'engagement_share': 0.375,
+            'tweets_per_day': 24.34,  # 2 tweets over 7100 s
+        },
+    ]
+
+
+def test_account_stats_for_selected_rows():
+    columns = EngagementColumns(timelines())
+    stats = account_stats(columns, columns.select(usernames=['bob', 'carol']))
+    assert [(entry['username'], entry['engagement'], entry['engagement_share'], entry['tweets_per_day'])
+            for entry in stats] == [('bob', 15, 1.0, 25.04)]  # 2 tweets over 6900 s
+
+    rows = columns.select(since=END_TS + 3600)
+    assert rows.tolist() == [0, 1, 3]
+    assert [(entry['username'], entry['tweets'], entry['median_engagement'])
+            for entry in account_stats(columns, rows)] == [('alice', 2, 12.5), ('bob', 1, 5.0)]
+    assert account_stats(columns, columns.select(until=END_TS - 1)) == []
+
+
+def test_percentiles():
+    columns = EngagementColumns(timelines())
+    assert percentiles(columns, points=(0, 50, 100)) == {
+        'likes': {'p0': 0.0, 'p50': 1.0, 'p100': 16.0},
+        'retweets': {'p0': 0.0, 'p50': 1.0, 'p100': 3.0},
+        'replies': {'p0': 0.0, 'p50': 0.0, 'p100': 1.0},
+        'engagement': {'p0': 0.0, 'p50': 9.0, 'p100': 16.0},
+    }
+    # Linear interpolation between 10 and 16 in [0, 5, 9, 10, 16]
+    assert percentiles(columns)['engagement'] == {'p50': 9.0, 'p90': 13.6, 'p99': 15.76}
+
+
+def test_rolling_windows():
+    # Buckets end at the newest tweet (END_TS + 7200), so they start at END_TS - 7199 + k * 3600
+    assert rolling_windows(EngagementColumns(timelines()), bucket=3600, window=2, points=3) == [
+        {'start': END_TS - 3599, 'tweets': 1, 'engagement': 0,
+         'rolling_tweets': 1, 'rolling_engagement': 0, 'rolling_engagement_per_tweet': 0.0},
+        {'start': END_TS + 1, 'tweets': 2, 'engagement': 19,
+         'rolling_tweets': 3, 'rolling_engagement': 19, 'rolling_engagement_per_tweet': 6.33},
+        {'start': END_TS + 3601, 'tweets': 2, 'engagement': 21,
+         'rolling_tweets': 4, 'rolling_engagement': 40, 'rolling_engagement_per_tweet': 10.0},
+    ]
+
+
+def test_top_tweets():
+    columns = EngagementColumns(timelines())
+    assert [(score, tweet.id) for score, tweet in top_tweets(columns, limit=3)] == [
+        (16, '13'), (10, '21'), (9, '12')
+    ]
+    rows = columns.select(usernames=['alice'])
+    assert [(score, tweet.id) for score, tweet in top_tweets(columns, rows, limit=10)] == [
+        (16, '13'), (9, '12'), (0, '11')
+    ]
+    assert top_tweets(columns, limit=0) == []
+
+
+def test_top_tweets_break_ties_newest_first():
+    columns = EngagementColumns({
+        'alice': [Tweet('100', 'c', END_TS + 60, 'alice', 5), Tweet('99', 'b', END_TS + 60, 'alice', 5)],
+        'bob': [Tweet('7', 'd', END_TS + 120, 'bob', 5), Tweet('5', 'a', END_TS, 'bob', 5)],
+    })
+    assert [tweet.id for _, tweet in top_tweets(columns, limit=3)] == ['7', '100', '99']
+
+
+def test_unchanged_accounts_reuse_their_columns():
+    by_user = timelines()
+    previous = EngagementColumns(by_user)
+    by_user = dict(by_user, bob=[Tweet('23', 'b3', END_TS + 7300, 'bob', 2)] + by_user['bob'])
+
+    columns = EngagementColumns(by_user, previous)
+    assert columns._blocks['alice'][1] is previous._blocks['alice'][1]
+    assert columns._blocks['bob'][1] is not previous._blocks['bob'][1]
+    assert columns.engagement.tolist() == [16, 9, 0, 2, 5, 10]
+
+
+def test_route_reports_the_snapshot(feed):
+    by_user = timelines()
+    alice, bob = feed.ACCOUNTS[:2]
+    by_user = {
+        alice: [Tweet(t.id, t.text, t.created_ts, alice, t.like_count, t.retweet_count, t.reply_count)
+                for t in by_user['alice']],
+        bob: [Tweet(t.id, t.text, t.created_ts, bob, t.like_count, t.retweet_count, t.reply_count)
+              for t in by_user['bob']],
+    }
+    tweets = sorted(by_user[alice] + by_user[bob], key=lambda tweet: tweet.sort_key, reverse=True)
+    feed.publish_snapshot(tweets, by_user, time.time())
+
+    response = feed.app.test_client().get('/analytics/engagement?top=2&bucket=3600&window=2&points=3')
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['version'] == feed.current_snapshot.version
+    assert (report['tweets'], report['from'], report['to']) == (5, END_TS, END_TS + 7200)
+    assert [(entry['username'], entry['engagement']) for entry in report['accounts']] == [(alice, 25), (bob, 15)]
+    assert [tweet['id'] for tweet in report['top']] == ['13', '21']
+    assert [point['rolling_engagement'] for point in report['windows']['points']] == [0, 19, 40]
+
+
+def test_route_is_unavailable_without_numpy(feed, monkeypatch):
+    monkeypatch.setattr(feed, 'NUMPY_AVAILABLE', False)
+    response = feed.app.test_client().get('/analytics/engagement')
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'Engagement analytics require numpy'}
+
+
+def test_columns_come_from_the_snapshot_they_are_built_for(feed):
+    first = {'alice': [Tweet('1', 'gm', END_TS, 'alice', 5)]}
+    feed.publish_snapshot(first['alice'], first, END_TS)
+    snapshot = feed.current_snapshot
+
+    # A refresh publishes between reading the snapshot and building its columns
+    second = {'alice': [Tweet('2', 'gn', END_TS + 60, 'alice', 9)] + first['alice']}
+    feed.publish_snapshot(second['alice'], second, END_TS + 60)
+
+    columns = feed.get_engagement_columns(snapshot)
+    assert feed.engagement_version == snapshot.version
+    assert columns.tweets == first['alice']
+
+    assert feed.get_engagement_columns(feed.current_snapshot).tweets == second['alice']
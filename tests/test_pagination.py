@@ -0,0 +1,136 @@
+"""
+Pagination tests - cursors and before/after pages over /tweets
+"""
+
+import random
+import time
+
+import pytest
+
+from tweet_model import Tweet
+
+END_TS = 1_750_000_000
+
+
+def publish(feed, tweets, fetched_at=END_TS):
+    by_user = {}
+    for tweet in tweets:
+        by_user.setdefault(tweet.username, []).append(tweet)
+    feed.publish_snapshot(tweets, by_user, fetched_at)
+
+
+@pytest.fixture
+def client(feed):
+    """A test client over 250 tweets from three accounts, about seven to each second."""
+    rng = random.Random(3)
+    accounts = feed.ACCOUNTS[:3]
+    tweets = [
+        Tweet(str(tweet_id), 'gm', END_TS + position // 7, accounts[tweet_id % 3])
+        for position, tweet_id in enumerate(rng.sample(range(1, 10 ** 6), 250))
+    ]
+    tweets.sort(key=lambda tweet: tweet.sort_key, reverse=True)
+    # Published just now, so requests serve it instead of refreshing
+    publish(feed, tweets, time.time())
+    return feed.app.test_client()
+
+
+def ids(response):
+    assert response.status_code == 200, response.get_json()
+    return [tweet['id'] for tweet in response.get_json()]
+
+
+def test_cursors_round_trip_ids_of_different_lengths(feed):
+    key = Tweet('99', 'gm', END_TS, 'alice').sort_key
+    assert feed.decode_cursor(feed.encode_cursor(key)) == key == (END_TS, 99)
+
+
+def test_pages_step_across_ids_of_different_lengths(feed):
+    # Same second, ids 8..12: numerically ordered, not as strings
+    tweets = [Tweet(str(tweet_id), 'gm', END_TS, 'alice') for tweet_id in range(12, 7, -1)]
+    publish(feed, tweets)
+    index = feed.page_indexes[feed.ALL_ACCOUNTS_KEY]
+
+    page, older_cursor, _ = feed.paginate(tweets, index, 2)
+    assert [tweet.id for tweet in page] == ['12', '11']
+    page, older_cursor, _ = feed.paginate(tweets, index, 2, before=feed.decode_cursor(older_cursor))
+    assert [tweet.id for tweet in page] == ['10', '9']
+    page, _, newer_cursor = feed.paginate(tweets, index, 2, before=feed.decode_cursor(older_cursor))
+    assert [tweet.id for tweet in page] == ['8']
+    page, _, _ = feed.paginate(tweets, index, 2, after=feed.decode_cursor(newer_cursor))
+    assert [tweet.id for tweet in page] == ['10', '9']
+
+
+def test_before_pages_cover_every_tweet_once(feed, client):
+    expected = [tweet.id for tweet in feed.tweet_cache]
+    seen = []
+    response = client.get('/tweets?limit=7')
+    while True:
+        page = ids(response)
+        assert 0 < len(page) <= 7
+        seen.extend(page)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        assert response.headers['Link'].startswith(f'</tweets?limit=7&before={cursor}>')
+        response = client.get(f'/tweets?limit=7&before={cursor}')
+    assert seen == expected
+
+
+def test_after_pages_walk_back_to_the_newest_tweet(feed, client):
+    expected = [tweet.id for tweet in feed.tweet_cache]
+    oldest = feed.encode_cursor(feed.tweet_cache[-1].sort_key)
+    response = client.get(f'/tweets?limit=9&before={oldest}')
+    assert ids(response) == []
+
+    seen = [expected[-1]]
+    cursor = oldest
+    while cursor is not None:
+        response = client.get(f'/tweets?limit=9&after={cursor}')
+        page = ids(response)
+        assert 0 < len(page) <= 9
+        seen = page + seen
+        cursor = response.headers.get('X-Prev-Cursor')
+    assert seen == expected
+
+
+def test_account_pages_cover_its_tweets_once(feed, client):
+    username = feed.ACCOUNTS[1]
+    expected = [tweet.id for tweet in feed.tweet_cache if tweet.username == username]
+    seen = []
+    response = client.get(f'/tweets/{username}?limit=10')
+    while True:
+        seen.extend(ids(response))
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        response = client.get(f'/tweets/{username}?limit=10&before={cursor}')
+    assert seen == expected
+
+
+@pytest.mark.parametrize('limit, size', [
+    (10 ** 6, 200),  # clamped to MAX_PAGE_SIZE
+    (201, 200),
+    (200, 200),
+    (0, 1),
+    (-5, 1),
+])
+def test_limit_is_clamped(feed, client, limit, size):
+    assert feed.MAX_PAGE_SIZE == 200
+    assert len(ids(client.get(f'/tweets?limit={limit}'))) == size
+
+
+@pytest.mark.parametrize('query', [
+    'limit=ten',
+    'before=garbage',
+    'before=1750000000',
+    'before=1750000000_',
+    'before=_42',
+    'before=soon_42',
+    'after=1750000000_abc',
+    'after=1750000000_-1',
+    'before=1750000000_42&after=1750000000_41',
+])
+def test_invalid_parameters_are_rejected(client, query):
+    response = client.get(f'/tweets?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,32 @@
+"""
+Polling tests - since_id polls that have to page through a burst of new tweets
+"""
+
+import pytest
+
+DAY = 86400
+
+
+@pytest.mark.parametrize('fake_api', [{'tweets_per_account': 3000, 'live_window': 14 * DAY}], indirect=True)
+def test_since_id_polls_page_through_bursts(feed, fake_api):
+    feed.refresh_tweet_cache()
+    first = {username: list(timeline) for username, timeline in feed.tweets_by_user.items()}
+    first_since_ids = dict(feed.since_ids)
+    assert first_since_ids.keys() == first.keys()
+
+    fake_api.clock.advance(7 * DAY)
+    feed.refresh_tweet_cache()
+
+    bursts = 0
+    for username, timeline in feed.tweets_by_user.items():
+        visible = fake_api.timeline(fake_api.register(username))
+        arrived = [tweet for tweet in visible if tweet.created_ts > fake_api.started_at]
+        bursts += len(arrived) > feed.POLL_PAGE_SIZE
+
+        # The newest tweets the API has, with no gap where a page boundary fell
+        expected = visible[:min(feed.MAX_TWEETS_PER_ACCOUNT, len(arrived) + len(first[username]))]
+        assert [tweet.id for tweet in timeline] == [tweet.id for tweet in expected], username
+        assert feed.since_ids[username] == int(visible[0].id)
+        if arrived:
+            assert feed.since_ids[username] > first_since_ids[username]
+    assert bursts, "no account got more than a page of new tweets"
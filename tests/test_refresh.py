@@ -0,0 +1,57 @@
+"""
+Refresh tests - what a sharded refresh publishes, and what it leaves alone
+"""
+
+import pytest
+
+from accounts import plan_shards
+
+
+@pytest.fixture(params=[1, 2], ids=['one_shard', 'two_shards'])
+def shards(request, feed, monkeypatch):
+    monkeypatch.setattr(feed, 'shard_plan', plan_shards(feed.ACCOUNTS, request.param))
+    return request.param
+
+
+def refresh_cycle(feed, shards):
+    for _ in range(shards):
+        feed.refresh_tweet_cache()
+
+
+def test_unchanged_refreshes_keep_published_timelines(feed, fake_api, shards):
+    refresh_cycle(feed, shards)
+    published = dict(feed.tweets_by_user)
+    assert all(published.values())
+
+    # Every account is polled again, but nothing new has been posted
+    refresh_cycle(feed, shards)
+    refresh_cycle(feed, shards)
+
+    assert feed.tweets_by_user.keys() == published.keys()
+    for username, timeline in published.items():
+        assert feed.tweets_by_user[username] is timeline, username
+
+
+def test_unchanged_mock_refreshes_keep_published_timelines(feed, shards):
+    refresh_cycle(feed, shards)
+    published = dict(feed.tweets_by_user)
+
+    refresh_cycle(feed, shards)
+
+    for username, timeline in published.items():
+        assert feed.tweets_by_user[username] is timeline, username
+
+
+def test_only_accounts_with_new_tweets_change(feed, fake_api):
+    feed.refresh_tweet_cache()
+    published = dict(feed.tweets_by_user)
+
+    fake_api.clock.advance(3600)
+    feed.refresh_tweet_cache()
+
+    changed = {username for username, timeline in published.items()
+               if feed.tweets_by_user[username] is not timeline}
+    grew = {username for username in published
+            if feed.tweets_by_user[username][0].id != published[username][0].id}
+    assert changed == grew
+    assert changed
@@ -0,0 +1,103 @@
+"""
+Search index tests - tokenizing, and keeping the index in step with published timelines
+"""
+
+import heapq
+
+import search_index
+from search_index import TweetSearchIndex, tokenize
+from tweet_model import Tweet
+
+END_TS = 1_750_000_000
+
+
+def merged(by_user):
+    return list(heapq.merge(*by_user.values(), key=lambda tweet: tweet.sort_key, reverse=True))
+
+
+def synced(by_user, index=None):
+    index = index or TweetSearchIndex()
+    index.sync(merged(by_user), by_user)
+    return index
+
+
+def found(index, query):
+    total, tweets = index.search(query, 100, sort='recent')
+    assert total == len(tweets)
+    return [tweet.id for tweet in tweets]
+
+
+def timelines():
+    return {
+        'alice': [
+            Tweet('6', '#Bitcoin ETF inflows', END_TS + 50, 'alice'),
+            Tweet('3', 'bitcoin treasury update', END_TS + 20, 'alice'),
+            Tweet('1', 'gm from the mining pool', END_TS, 'alice'),
+        ],
+        'bob': [
+            Tweet('5', 'Buying more $BTC and $MSTR', END_TS + 40, 'bob'),
+            Tweet('2', 'cc @Alice: mining difficulty up', END_TS + 10, 'bob'),
+        ],
+        'carol': [
+            Tweet('4', 'ETF flows were flat today', END_TS + 30, 'carol'),
+        ],
+    }
+
+
+def test_tokenize_keeps_tags_with_and_without_their_prefix():
+    assert tokenize('#Bitcoin to $BTC, cc @Saylor!') == {
+        '#bitcoin', 'bitcoin', 'to', '$btc', 'btc', 'cc', '@saylor', 'saylor',
+    }
+    assert tokenize('$100k or bust') == {'$100k', '100k', 'or', 'bust'}
+    assert tokenize('# $ @') == set()
+
+
+def test_tags_match_only_tags_while_plain_words_match_both():
+    index = synced(timelines())
+    assert found(index, '#bitcoin') == ['6']
+    assert found(index, 'bitcoin') == ['6', '3']
+    assert found(index, '$btc') == ['5']
+    assert found(index, 'btc') == ['5']
+    assert found(index, '@alice') == ['2']
+    assert found(index, 'etf OR $mstr') == ['6', '5', '4']
+
+
+def test_sync_only_tokenizes_the_changed_account(monkeypatch):
+    by_user = timelines()
+    index = synced(by_user)
+
+    calls = []
+    monkeypatch.setattr(search_index, 'tokenize', lambda text: calls.append(text) or tokenize(text))
+
+    # bob posts one tweet; his others are refetched as new objects with fresher metrics
+    by_user = dict(by_user)
+    by_user['bob'] = [Tweet('7', '$BTC new high', END_TS + 60, 'bob')] + [
+        Tweet(tweet.id, tweet.text, tweet.created_ts, 'bob', tweet.like_count + 10)
+        for tweet in by_user['bob']
+    ]
+    synced(by_user, index)
+
+    assert calls == ['$BTC new high']
+    assert found(index, '$btc') == ['7', '5']
+    assert index.search('$btc', 10, sort='recent')[1][1].like_count == 10
+    assert found(index, '#bitcoin') == ['6']
+
+    fresh = synced(by_user)
+    assert index._postings == fresh._postings
+    assert index._docs == fresh._docs
+
+
+def test_sync_removes_tweets_that_fell_out_of_a_timeline():
+    by_user = timelines()
+    index = synced(by_user)
+
+    # alice's oldest tweet is evicted and carol is no longer followed
+    by_user = {'alice': by_user['alice'][:2], 'bob': by_user['bob']}
+    synced(by_user, index)
+
+    assert len(index) == 4
+    assert found(index, 'mining') == ['2']
+    assert found(index, 'etf') == ['6']
+    assert found(index, 'gm') == []
+    assert 'flat' not in index._postings
+    assert index._postings == synced(by_user)._postings
@@ -0,0 +1,168 @@
+"""
+Shard tests - shard plans, account reloads and splicing a refreshed shard into the timeline
+"""
+
+import heapq
+import os
+import random
+
+import pytest
+
+from accounts import AccountRegistry, plan_shards, shard_of
+from synthetic_data import synthetic_accounts, synthetic_timelines
+from tweet_model import Tweet
+
+END_TS = 1_750_000_000
+
+
+def full_merge(feed, by_user):
+    return list(heapq.merge(*by_user.values(), key=feed.tweet_sort_key, reverse=True))
+
+
+def refreshed_shard(by_user, usernames, rng, next_id):
+    """Return by_user with usernames' timelines replaced as a poll would: new tweets on top,
+    some tweets refetched as new objects with fresher metrics, the oldest evicted."""
+    by_user = dict(by_user)
+    for username in usernames:
+        timeline = by_user[username]
+        newest = timeline[0].created_ts if timeline else END_TS
+        new = [Tweet(str(next_id + i), 'new', newest + 1 + i, username) for i in range(rng.randint(0, 3))]
+        next_id += len(new)
+        kept = [
+            Tweet(tweet.id, tweet.text, tweet.created_ts, username, tweet.like_count + 1)
+            if rng.random() < 0.1 else tweet
+            for tweet in timeline[:len(timeline) - rng.randint(0, 2)]
+        ]
+        by_user[username] = sorted(new, key=lambda tweet: tweet.sort_key, reverse=True) + kept
+    return by_user, next_id
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_splicing_a_shard_matches_a_full_merge(feed, seed):
+    rng = random.Random(seed)
+    accounts = synthetic_accounts(24)
+    by_user = synthetic_timelines(accounts, 50, seed, END_TS)
+    feed.publish_snapshot(full_merge(feed, by_user), by_user, END_TS)
+    next_id = 10 ** 18
+
+    plan = plan_shards(accounts, 4)
+    for cycle in range(8):
+        owned, _ = plan[cycle % len(plan)]
+        by_user, next_id = refreshed_shard(by_user, owned, rng, next_id)
+        with feed._publish_lock:
+            spliced, index = feed.merge_changed_timelines(by_user)
+            feed.publish_snapshot(spliced, by_user, END_TS, index=index)
+
+        expected = full_merge(feed, by_user)
+        assert [id(tweet) for tweet in spliced] == [id(tweet) for tweet in expected]
+        assert index == feed.build_page_index(expected)
+        assert feed.page_indexes == {
+            **{username: feed.build_page_index(timeline) for username, timeline in by_user.items()},
+            feed.ALL_ACCOUNTS_KEY: feed.build_page_index(expected),
+        }
+
+
+def test_splicing_drops_removed_accounts(feed):
+    accounts = synthetic_accounts(6)
+    by_user = synthetic_timelines(accounts, 20, 1, END_TS)
+    feed.publish_snapshot(full_merge(feed, by_user), by_user, END_TS)
+
+    remaining = {username: timeline for username, timeline in by_user.items() if username != accounts[2]}
+    with feed._publish_lock:
+        spliced, index = feed.merge_changed_timelines(remaining)
+
+    assert spliced == full_merge(feed, remaining)
+    assert index == feed.build_page_index(spliced)
+
+
+def test_refreshes_against_the_api_match_a_full_merge(feed, fake_api, monkeypatch):
+    monkeypatch.setattr(feed, 'shard_plan', plan_shards(feed.ACCOUNTS, 3))
+    for _ in range(3):
+        feed.refresh_tweet_cache()
+    for _ in range(6):
+        fake_api.clock.advance(900)
+        feed.refresh_tweet_cache()
+        assert feed.tweet_cache == full_merge(feed, feed.tweets_by_user)
+        assert feed.page_indexes[feed.ALL_ACCOUNTS_KEY] == feed.build_page_index(feed.tweet_cache)
+
+
+@pytest.mark.parametrize('shards', [1, 3, 7])
+@pytest.mark.parametrize('worker_count', [1, 2, 5])
+def test_plan_shards_covers_every_account_once(shards, worker_count):
+    accounts = synthetic_accounts(200)
+    plans = [plan_shards(accounts, shards, worker_count, index) for index in range(worker_count)]
+
+    owners = {}
+    for worker, plan in enumerate(plans):
+        assert len(plan) == shards
+        seen = []
+        for slot, (owned, foreign) in enumerate(plan):
+            assert not set(owned) & set(foreign)
+            seen.extend(owned + foreign)
+            for username in owned + foreign:
+                assert shard_of(username, shards) == slot
+            for username in owned:
+                assert username not in owners, username
+                owners[username] = (worker, slot)
+        # Every worker sees every account exactly once: owned or read from the store
+        assert sorted(seen) == sorted(accounts)
+    assert set(owners) == set(accounts)
+
+
+def test_plan_shards_is_stable_when_accounts_are_added():
+    accounts = synthetic_accounts(50)
+    before = plan_shards(accounts, 4, 2, 0)
+    after = plan_shards(accounts + ['newcomer'], 4, 2, 0)
+    for (owned, foreign), (owned_after, foreign_after) in zip(before, after):
+        assert set(owned) <= set(owned_after)
+        assert set(foreign) <= set(foreign_after)
+
+
+def write_accounts(path, lines, mtime):
+    path.write_text('\n'.join(lines) + '\n')
+    os.utime(path, (mtime, mtime))
+
+
+def test_registry_reloads_added_and_dropped_accounts(tmp_path):
+    path = tmp_path / 'accounts.txt'
+    write_accounts(path, ['alice', '@bob  # comment', '', 'Alice'], 1_000)
+    registry = AccountRegistry(str(path), reload_interval=0)
+    assert registry.accounts == ['alice', 'bob']
+    assert registry.source == 'file'
+
+    assert not registry.refresh()
+
+    write_accounts(path, ['bob', 'carol'], 2_000)
+    assert registry.refresh()
+    assert registry.accounts == ['bob', 'carol']
+    assert registry.canonical('@CAROL') == 'carol'
+    assert registry.canonical('alice') is None
+
+
+def test_registry_keeps_accounts_when_the_file_is_emptied(tmp_path):
+    path = tmp_path / 'accounts.txt'
+    write_accounts(path, ['alice'], 1_000)
+    registry = AccountRegistry(str(path), reload_interval=0)
+
+    write_accounts(path, ['# nobody'], 2_000)
+    assert not registry.refresh()
+    assert registry.accounts == ['alice']
+
+
+def test_update_accounts_follows_the_file(feed, tmp_path, monkeypatch):
+    path = tmp_path / 'accounts.txt'
+    write_accounts(path, ['alice', 'bob'], 1_000)
+    monkeypatch.setattr(feed, 'account_registry', AccountRegistry(str(path), reload_interval=0))
+    monkeypatch.setattr(feed, 'ACCOUNTS', feed.ACCOUNTS)
+    monkeypatch.setattr(feed, 'shard_plan', feed.shard_plan)
+    feed.apply_accounts(feed.account_registry.accounts)
+    feed.account_timelines['bob'] = [Tweet('1', 'gm', END_TS, 'bob')]
+    feed.since_ids['bob'] = 1
+
+    write_accounts(path, ['alice', 'carol'], 2_000)
+    feed.update_accounts()
+
+    assert feed.ACCOUNTS == ['alice', 'carol']
+    assert 'bob' not in feed.account_timelines and 'bob' not in feed.since_ids
+    planned = [username for owned, foreign in feed.shard_plan for username in owned + foreign]
+    assert sorted(planned) == ['alice', 'carol']
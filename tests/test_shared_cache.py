@@ -0,0 +1,71 @@
+"""
+Shared cache tests - leader election and publishing through each snapshot backend
+"""
+
+import pytest
+
+from shared_cache import BACKENDS, FCNTL_AVAILABLE, SharedCache, SnapshotBackend
+
+needs_fcntl = pytest.mark.skipif(not FCNTL_AVAILABLE, reason="leader election needs fcntl")
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def caches(request, tmp_path):
+    """Two workers' SharedCache on the same path."""
+    path = str(tmp_path / 'snapshot')
+    return SharedCache(request.param, path), SharedCache(request.param, path)
+
+
+def sections(version):
+    return {'body': f'[{version}]'.encode(), 'gzip': bytes(range(version))}
+
+
+@needs_fcntl
+def test_only_one_worker_leads(caches):
+    first, second = caches
+    assert first.try_lead()
+    assert not second.try_lead()
+    assert first.try_lead()
+    assert first.is_leader and not second.is_leader
+
+
+@needs_fcntl
+def test_follower_sees_each_published_version(caches):
+    leader, follower = caches
+    assert leader.try_lead() and not follower.try_lead()
+    assert follower.latest(None) is None
+
+    leader.publish(3, {'fetched_at': 100, 'accounts': ['alice']}, sections(3))
+    snapshot = follower.latest(None)
+    assert snapshot.version == 3
+    assert snapshot.meta == {'fetched_at': 100, 'accounts': ['alice']}
+    assert bytes(snapshot.section('body')) == b'[3]'
+    assert bytes(snapshot.section('gzip')) == bytes(range(3))
+    assert 'br' not in snapshot
+    assert follower.latest(3) is None
+
+    leader.publish(4, {'fetched_at': 200, 'accounts': []}, sections(4))
+    snapshot = follower.latest(3)
+    assert snapshot.version == 4
+    assert bytes(snapshot.section('body')) == b'[4]'
+
+
+@needs_fcntl
+def test_follower_takes_over_when_the_leader_exits(caches):
+    leader, follower = caches
+    assert leader.try_lead()
+    # Closing the lock file is what the leader's process exiting does
+    leader.leader._file.close()
+    assert follower.try_lead()
+
+
+def test_backends_must_implement_the_interface():
+    with pytest.raises(TypeError):
+        SnapshotBackend()
+
+    class VersionOnly(SnapshotBackend):
+        def version(self):
+            return None
+
+    with pytest.raises(TypeError):
+        VersionOnly()
@@ -0,0 +1,101 @@
+"""
+Stream tests - SSE event ids, the replay log and when a reconnecting client is reset
+"""
+
+import json
+
+import pytest
+
+from tweet_model import Tweet
+
+END_TS = 1_750_000_000
+
+
+def parse_events(messages):
+    events = []
+    for message in messages:
+        fields = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+        events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def publish(broadcaster, count, first_id=1):
+    for offset in range(count):
+        broadcaster.publish([Tweet(str(first_id + offset), 'gm', END_TS + offset, 'alice')])
+
+
+@pytest.fixture
+def broadcaster(feed, monkeypatch):
+    broadcaster = feed.TweetBroadcaster(queue_size=10, replay_size=5)
+    monkeypatch.setattr(feed, 'broadcaster', broadcaster)
+    return broadcaster
+
+
+def test_event_ids_increase_with_every_publish(broadcaster):
+    subscriber, backlog = broadcaster.subscribe()
+    assert backlog == []
+
+    # Ids follow publishing order, not tweet order
+    broadcaster.publish([Tweet('9', 'newest', END_TS + 60, 'alice')])
+    broadcaster.publish([Tweet('5', 'late arrival', END_TS, 'bob')])
+    broadcaster.publish([])
+
+    events = parse_events([subscriber.get_nowait(), subscriber.get_nowait()])
+    assert [(sequence, event) for sequence, event, _ in events] == [(1, 'tweets'), (2, 'tweets')]
+    assert [tweets[0]['id'] for _, _, tweets in events] == ['9', '5']
+    assert subscriber.empty()
+
+
+def test_reconnect_replays_updates_after_its_id(broadcaster):
+    publish(broadcaster, 4)
+
+    _, backlog = broadcaster.subscribe('2')
+    assert [(sequence, tweets[0]['id']) for sequence, _, tweets in parse_events(backlog)] == [(3, '3'), (4, '4')]
+
+    _, backlog = broadcaster.subscribe('4')
+    assert backlog == []
+
+
+def test_reconnect_is_reset_only_once_its_id_leaves_the_log(broadcaster):
+    publish(broadcaster, 8)  # the log keeps 4..8
+
+    _, backlog = broadcaster.subscribe('3')
+    assert [sequence for sequence, _, _ in parse_events(backlog)] == [4, 5, 6, 7, 8]
+
+    _, backlog = broadcaster.subscribe('2')
+    assert parse_events(backlog) == [(8, 'reset', {})]
+
+
+@pytest.mark.parametrize('last_event_id', ['9', '1750000000_42', 'garbage'])
+def test_unknown_ids_are_reset(broadcaster, last_event_id):
+    # Ids from before a restart, or in the old cursor format
+    publish(broadcaster, 3)
+    _, backlog = broadcaster.subscribe(last_event_id)
+    assert parse_events(backlog) == [(3, 'reset', {})]
+
+
+def test_slow_subscriber_is_dropped_and_resumes_from_the_log(feed):
+    broadcaster = feed.TweetBroadcaster(queue_size=2, replay_size=10)
+    subscriber, _ = broadcaster.subscribe()
+    publish(broadcaster, 3)
+
+    assert subscriber.get_nowait() is None
+    assert broadcaster.subscriber_count() == 0
+
+    _, backlog = broadcaster.subscribe('0')
+    assert [sequence for sequence, _, _ in parse_events(backlog)] == [1, 2, 3]
+
+
+def test_stream_route_sends_the_backlog_then_live_updates(feed, broadcaster):
+    feed.refresh_tweet_cache()
+    publish(broadcaster, 3)
+
+    response = feed.app.test_client().get('/tweets/stream', headers={'Last-Event-ID': '1'}, buffered=False)
+    body = (chunk.decode() for chunk in response.response)
+    assert next(body).startswith('retry:')
+    assert [sequence for sequence, _, _ in parse_events([next(body), next(body)])] == [2, 3]
+
+    publish(broadcaster, 1, first_id=100)
+    assert parse_events([next(body)])[0][:2] == (4, 'tweets')
+    response.close()
+    assert broadcaster.subscriber_count() == 0
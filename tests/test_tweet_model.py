@@ -0,0 +1,104 @@
+"""
+Tweet model tests - timestamp normalization and timeline order under a non-UTC local zone
+"""
+
+import heapq
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tweet_model import Tweet, normalize_created_at
+
+# 2024-03-10 12:00:00 UTC, after the US switch to daylight saving time
+EPOCH = 1710072000
+LOCAL_ZONE = 'America/New_York'  # UTC-4 at EPOCH
+
+
+@pytest.fixture(autouse=True)
+def local_zone(monkeypatch):
+    """Run every test with a local zone that is not UTC, restoring the zone afterwards."""
+    if not hasattr(time, 'tzset'):
+        pytest.skip("time.tzset is not available on this platform")
+    monkeypatch.setenv('TZ', LOCAL_ZONE)
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def same_instant_inputs(epoch):
+    """The same instant as each input form normalize_created_at accepts."""
+    aware = datetime.fromtimestamp(epoch, timezone.utc)
+    return {
+        'naive_local': datetime.fromtimestamp(epoch),
+        'aware_utc': aware,
+        'aware_offset': aware.astimezone(timezone(timedelta(hours=5, minutes=30))),
+        'iso_z': aware.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'iso_offset': aware.astimezone(timezone(timedelta(hours=-4))).isoformat(),
+        'epoch_int': epoch,
+        'epoch_float': epoch + 0.75,
+    }
+
+
+def test_local_zone_is_not_utc():
+    assert datetime.fromtimestamp(EPOCH).hour != datetime.fromtimestamp(EPOCH, timezone.utc).hour
+
+
+@pytest.mark.parametrize('form', sorted(same_instant_inputs(EPOCH)))
+def test_normalize_created_at_returns_utc_epoch(form):
+    assert normalize_created_at(same_instant_inputs(EPOCH)[form]) == EPOCH
+
+
+def test_created_at_round_trips_as_utc():
+    tweet = Tweet.create('1', 'gm', datetime.fromtimestamp(EPOCH), 'alice')
+    assert tweet.created_ts == EPOCH
+    assert tweet.created_at == datetime.fromtimestamp(EPOCH, timezone.utc)
+    assert tweet.to_json()['created_at'] == 'Sun, 10 Mar 2024 12:00:00 GMT'
+
+
+def test_merged_timeline_follows_timestamps_across_input_forms():
+    # Each account's timeline uses a different input form, as API and mock data do
+    forms = sorted(same_instant_inputs(EPOCH))
+    timelines = []
+    expected = []
+    for account, form in enumerate(forms):
+        username = f'account{account}'
+        tweets = []
+        for step in range(5):
+            # Interleave accounts: account k tweets at EPOCH + k*60 + step*3600
+            epoch = EPOCH + account * 60 + step * 3600
+            tweets.append(Tweet.create(str(account * 10 + step), 'text',
+                                       same_instant_inputs(epoch)[form], username))
+            expected.append(epoch)
+        tweets.sort(key=lambda tweet: tweet.sort_key, reverse=True)
+        timelines.append(tweets)
+
+    merged = list(heapq.merge(*timelines, key=lambda tweet: tweet.sort_key, reverse=True))
+
+    assert [tweet.created_ts for tweet in merged] == sorted(expected, reverse=True)
+    assert len({tweet.username for tweet in merged[:len(forms)]}) == len(forms)
+
+
+def test_same_second_tweets_order_by_id():
+    older = Tweet.create('100', 'a', EPOCH, 'alice')
+    newer = Tweet.create('101', 'b', datetime.fromtimestamp(EPOCH), 'bob')
+    merged = list(heapq.merge([newer], [older], key=lambda tweet: tweet.sort_key, reverse=True))
+    assert merged == [newer, older]
+
+
+def test_same_second_ids_of_different_lengths_order_numerically():
+    shorter = Tweet.create('99', 'a', EPOCH, 'alice')
+    longer = Tweet.create('100', 'b', EPOCH, 'bob')
+    assert longer.sort_key > shorter.sort_key
+    merged = list(heapq.merge([longer], [shorter], key=lambda tweet: tweet.sort_key, reverse=True))
+    assert merged == [longer, shorter]
+
+
+def test_unpacked_tweet_keeps_its_sort_key():
+    tweet = Tweet.create('1800000000000000000', 'gm', EPOCH, 'alice')
+    assert Tweet.unpack(tweet.pack()).sort_key == tweet.sort_key == (EPOCH, 1800000000000000000)
@@ -0,0 +1,126 @@
+"""
+Tweet Model - compact in-memory representation of a tweet
+
+Tweets are held in slotted Tweet objects from ingestion through caching, with
+the username interned and metrics stored as plain integers. They are turned
+into the JSON shape the front end expects only at the serialization boundary
+(see Tweet.to_json).
+"""
+
+import sys
+from datetime import datetime, timezone
+from email.utils import formatdate
+
+NO_MEDIA = ()
+NO_REFERENCES = ()
+
+
+def normalize_created_at(value):
+    """Return UTC epoch seconds for a tweet timestamp.
+
+    The API returns tz-aware datetimes while mock data uses naive local ones;
+    naive values are taken as local time so both end up on the same UTC clock.
+    ISO 8601 strings and epoch numbers are accepted too.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return int(value.astimezone(timezone.utc).timestamp())
+
+
+class Tweet:
+    """A single tweet.
+
+    created_ts (UTC epoch seconds) is the only stored timestamp; created_at is
+    derived from it on demand. Tweets are ordered newest first by sort_key,
+    (created_ts, numeric id), built once here: ids are strings of varying
+    length, so comparing them as strings would put '99' after '100'.
+    """
+
+    __slots__ = (
+        'id', 'text', 'created_ts', 'username',
+        'like_count', 'retweet_count', 'reply_count',
+        'media_urls', 'referenced_tweets', 'sort_key',
+    )
+
+    def __init__(self, id, text, created_ts, username, like_count=0, retweet_count=0,
+                 reply_count=0, media_urls=NO_MEDIA, referenced_tweets=NO_REFERENCES):
+        self.id = id
+        self.text = text
+        self.created_ts = created_ts
+        self.username = username
+        self.like_count = like_count
+        self.retweet_count = retweet_count
+        self.reply_count = reply_count
+        self.media_urls = media_urls
+        self.referenced_tweets = referenced_tweets
+        self.sort_key = (created_ts, int(id))
+
+    @classmethod
+    def create(cls, id, text, created_at, username, metrics=None, media_urls=(), referenced_tweets=()):
+        """Build a Tweet from raw API/mock values, normalizing them once at ingestion.
+
+        The id becomes a string (tweet ids don't fit in a JavaScript number),
+        created_at becomes UTC epoch seconds and the username is interned.
+        """
+        metrics = metrics or {}
+        return cls(
+            str(id),
+            text,
+            normalize_created_at(created_at),
+            sys.intern(username),
+            int(metrics.get('like_count', 0)),
+            int(metrics.get('retweet_count', 0)),
+            int(metrics.get('reply_count', 0)),
+            tuple(media_urls) or NO_MEDIA,
+            tuple(referenced_tweets) or NO_REFERENCES,
+        )
+
+    @property
+    def created_at(self):
+        return datetime.fromtimestamp(self.created_ts, timezone.utc)
+
+    @property
+    def metrics(self):
+        return {
+            'like_count': self.like_count,
+            'retweet_count': self.retweet_count,
+            'reply_count': self.reply_count
+        }
+
+    def to_json(self):
+        """Return the JSON-ready dict served by the API."""
+        return {
+            'id': self.id,
+            'text': self.text,
+            'created_at': formatdate(self.created_ts, usegmt=True),
+            'created_ts': self.created_ts,
+            'username': self.username,
+            'metrics': self.metrics,
+            'media_urls': list(self.media_urls),
+            'referenced_tweets': list(self.referenced_tweets)
+        }
+
+    def pack(self):
+        """Return the tweet's fields as a list in constructor order (compact JSON for the shared cache)."""
+        return [
+            self.id, self.text, self.created_ts, self.username,
+            self.like_count, self.retweet_count, self.reply_count,
+            self.media_urls, self.referenced_tweets,
+        ]
+
+    @classmethod
+    def unpack(cls, values):
+        """Rebuild a Tweet from pack()'s list once it has been through JSON."""
+        (id, text, created_ts, username, like_count, retweet_count, reply_count,
+         media_urls, referenced_tweets) = values
+        return cls(
+            id, text, created_ts, sys.intern(username),
+            like_count, retweet_count, reply_count,
+            tuple(media_urls) or NO_MEDIA,
+            tuple(referenced_tweets) or NO_REFERENCES,
+        )
+
+    def __repr__(self):
+        return f"Tweet(id={self.id!r}, username={self.username!r}, created_ts={self.created_ts})"
@@ -0,0 +1,200 @@
+"""
+Tweet Store - SQLite persistence for the Bitcoin X Feed
+
+Keeps every tweet fetched from the API (text, metrics, media URLs and referenced
+tweets) in a local SQLite database so the app can warm its cache at startup and
+serve history that goes beyond the live API window. It can also hold the list of followed accounts,
+and lets worker processes read the timelines other workers fetched.
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+from tweet_model import NO_MEDIA, NO_REFERENCES, Tweet
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    created_at INTEGER NOT NULL,  -- UTC epoch seconds
+    text TEXT NOT NULL,
+    like_count INTEGER NOT NULL DEFAULT 0,
+    retweet_count INTEGER NOT NULL DEFAULT 0,
+    reply_count INTEGER NOT NULL DEFAULT 0,
+    media_urls TEXT NOT NULL DEFAULT '[]',
+    referenced_tweets TEXT NOT NULL DEFAULT '[]'  -- JSON list of {type, id, text, username}
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_username_created_at ON tweets (username, created_at);
+CREATE INDEX IF NOT EXISTS idx_tweets_created_at ON tweets (created_at);
+CREATE TABLE IF NOT EXISTS accounts (
+    username TEXT PRIMARY KEY COLLATE NOCASE,
+    added_at INTEGER NOT NULL  -- UTC epoch seconds
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO tweets (id, username, created_at, text, like_count, retweet_count, reply_count, media_urls,
+                    referenced_tweets)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    text = excluded.text,
+    like_count = excluded.like_count,
+    retweet_count = excluded.retweet_count,
+    reply_count = excluded.reply_count,
+    media_urls = excluded.media_urls,
+    referenced_tweets = excluded.referenced_tweets
+"""
+
+COLUMNS = "id, username, created_at, text, like_count, retweet_count, reply_count, media_urls, referenced_tweets"
+
+# Columns added after the first release: (name, definition) for ALTER TABLE on older databases
+MIGRATIONS = [
+    ('referenced_tweets', "TEXT NOT NULL DEFAULT '[]'"),
+]
+
+
+def tweet_to_row(tweet):
+    """Flatten a Tweet into a row for UPSERT_SQL."""
+    return (
+        int(tweet.id),
+        tweet.username,
+        tweet.created_ts,
+        tweet.text,
+        tweet.like_count,
+        tweet.retweet_count,
+        tweet.reply_count,
+        json.dumps(tweet.media_urls),
+        json.dumps(tweet.referenced_tweets),
+    )
+
+
+def row_to_tweet(row):
+    """Rebuild a Tweet from a row."""
+    (tweet_id, username, created_at, text, like_count, retweet_count, reply_count,
+     media_urls, referenced_tweets) = row
+    return Tweet(
+        str(tweet_id),
+        text,
+        created_at,
+        sys.intern(username),
+        like_count,
+        retweet_count,
+        reply_count,
+        media_urls=tuple(json.loads(media_urls)) or NO_MEDIA,
+        referenced_tweets=tuple(json.loads(referenced_tweets)) or NO_REFERENCES
+    )
+
+
+class TweetStore:
+    """SQLite-backed tweet store, safe to share between fetch threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+            self._conn.commit()
+
+    def _migrate(self):
+        """Add columns missing from a database created by an older version."""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(tweets)")}
+        for name, definition in MIGRATIONS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE tweets ADD COLUMN {name} {definition}")
+
+    def upsert_tweets(self, tweets):
+        """Insert or update tweets in one batched transaction."""
+        rows = [tweet_to_row(tweet) for tweet in tweets]
+        if not rows:
+            return 0
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(UPSERT_SQL, rows)
+        return len(rows)
+
+    def recent_tweets(self, username, limit):
+        """Return an account's newest tweets, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {COLUMNS} FROM tweets WHERE username = ? "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (username, limit)
+            ).fetchall()
+        return [row_to_tweet(row) for row in rows]
+
+    def tweets_before(self, created_at, limit, usernames=None, before_id=None):
+        """Return up to limit tweets older than created_at (epoch seconds), newest first.
+
+        With before_id, tweets from that same second with a smaller id are included
+        too, so (created_at, id) can be used as a keyset pagination cursor.
+        """
+        if before_id is None:
+            query = f"SELECT {COLUMNS} FROM tweets WHERE created_at < ?"
+            params = [created_at]
+        else:
+            query = f"SELECT {COLUMNS} FROM tweets WHERE (created_at < ? OR (created_at = ? AND id < ?))"
+            params = [created_at, created_at, before_id]
+        if usernames:
+            query += f" AND username IN ({', '.join('?' * len(usernames))})"
+            params.extend(usernames)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [row_to_tweet(row) for row in rows]
+
+    def recent_tweets_by_user(self, usernames, limit, batch_size=500):
+        """Return {username: newest tweets, newest first} for several accounts in few queries."""
+        timelines = {username: [] for username in usernames}
+        usernames = list(usernames)
+        for start in range(0, len(usernames), batch_size):
+            batch = usernames[start:start + batch_size]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {COLUMNS} FROM ("
+                    f"  SELECT {COLUMNS}, ROW_NUMBER() OVER ("
+                    "    PARTITION BY username ORDER BY created_at DESC, id DESC"
+                    "  ) AS position FROM tweets"
+                    f"  WHERE username IN ({', '.join('?' * len(batch))})"
+                    ") WHERE position <= ? ORDER BY username, created_at DESC, id DESC",
+                    (*batch, limit)
+                ).fetchall()
+            for row in rows:
+                timelines.setdefault(row[1], []).append(row_to_tweet(row))
+        return timelines
+
+    def followed_accounts(self):
+        """Return the usernames in the accounts table, in the order they were added."""
+        with self._lock:
+            rows = self._conn.execute("SELECT username FROM accounts ORDER BY added_at, rowid").fetchall()
+        return [username for (username,) in rows]
+
+    def replace_followed_accounts(self, usernames):
+        """Replace the accounts table with usernames in one transaction."""
+        now = int(time.time())
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM accounts")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO accounts (username, added_at) VALUES (?, ?)",
+                    [(username, now) for username in usernames]
+                )
+
+    def since_ids(self):
+        """Return {username: newest stored tweet id} for every account in the store."""
+        with self._lock:
+            rows = self._conn.execute("SELECT username, MAX(id) FROM tweets GROUP BY username").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
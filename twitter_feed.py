@@ -3,6 +3,9 @@ import tweepy
 from flask import Flask, render_template, jsonify
 from dotenv import load_dotenv
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from accounts import load_account_list
+from api_session import ApiSession
 
 # Load environment variables
 load_dotenv()
@@ -13,18 +16,10 @@ consumer_secret = os.getenv('TWITTER_CONSUMER_SECRET')
 access_token = os.getenv('TWITTER_ACCESS_TOKEN')
 access_token_secret = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
 bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
+api_base_url = os.getenv('TWITTER_API_BASE_URL')  # e.g. a local fake_twitter_api.py server
 
-# List of Twitter accounts to follow
-accounts = [
-    'saylor',
-    'martypartymusic',
-    'RaoulGMI',
-    'Excellion',
-    'BitcoinMagazine',
-    'rektcapital',
-    'APompliano',
-    'BTC_Archive'
-]
+# List of Twitter accounts to follow (ACCOUNTS_FILE if it exists, else the defaults in accounts.py)
+accounts = load_account_list(os.getenv('ACCOUNTS_FILE', 'accounts.txt'))
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -34,6 +29,11 @@ tweet_cache = {}
 last_fetch_time = 0
 CACHE_DURATION = 300  # 5 minutes in seconds
 
+# Concurrent fetch settings
+FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY', '8'))  # max accounts fetched at once
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', '10'))  # seconds allowed per account
+fetch_executor = ThreadPoolExecutor(max_workers=max(1, FETCH_CONCURRENCY), thread_name_prefix='tweet-fetch')
+
 def get_twitter_client():
     """Initialize and return the Twitter API client."""
     if not bearer_token:
@@ -46,6 +46,15 @@ def get_twitter_client():
         access_token=access_token,
         access_token_secret=access_token_secret
     )
+    if api_base_url:
+        client.session = ApiSession(
+            pool_size=max(1, FETCH_CONCURRENCY),
+            connect_timeout=3.05,
+            read_timeout=FETCH_TIMEOUT,
+            retries=0,
+            backoff_factor=0,
+            base_url=api_base_url
+        )
     
     return client
 
@@ -234,10 +243,34 @@ def fetch_all_tweets():
     if current_time - last_fetch_time < CACHE_DURATION and tweet_cache:
         return tweet_cache
     
+    # Fetch accounts in parallel, each with its own timeout once a worker picks it up
+    started = {}
+    
+    def run(username):
+        started[username] = time.monotonic()
+        return fetch_user_tweets(username)
+    
+    futures = {fetch_executor.submit(run, username): username for username in accounts}
     all_tweets = []
-    for username in accounts:
-        user_tweets = fetch_user_tweets(username)
-        all_tweets.extend(user_tweets)
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        deadlines = [started[futures[f]] + FETCH_TIMEOUT for f in pending if futures[f] in started]
+        timeout = max(0, min(deadlines) - now) if deadlines else FETCH_TIMEOUT
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            try:
+                all_tweets.extend(future.result())
+            except Exception as e:
+                print(f"Error fetching tweets for {futures[future]}: {str(e)}")
+        
+        now = time.monotonic()
+        for future in list(pending):
+            username = futures[future]
+            if username in started and now - started[username] >= FETCH_TIMEOUT:
+                pending.discard(future)
+                print(f"Timed out fetching tweets for {username} after {FETCH_TIMEOUT}s")
     
     # Sort tweets by creation date (newest first)
     all_tweets.sort(key=lambda x: x['created_at'], reverse=True)
@@ -6,20 +6,86 @@ using the Twitter API (or mock data if API credentials aren't available).
 """
 
 import os
+import importlib.util
 import json
-import time
+import queue
 import random
-from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request
+import time
+import bisect
+import gzip
+import hashlib
+import heapq
+import itertools
+import math
+import threading
+import cProfile
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import Flask, Response, g, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 
-# Try to import tweepy, handle import error for testing
-try:
+from accounts import AccountRegistry, plan_shards
+from engagement import (
+    DEFAULT_PERCENTILES, NUMPY_AVAILABLE, EngagementColumns,
+    account_stats, percentiles, rolling_windows, top_tweets
+)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Counter, Gauge, MetricsRegistry
+from poll_scheduler import PollScheduler, RateLimitTracker, endpoint_key
+from request_profiler import ProfileRing, current_trace, end_trace, stage, start_trace
+from search_index import SORT_ORDERS, TweetSearchIndex
+from shared_cache import SharedCache
+from synthetic_data import DEFAULT_SEED, iter_account_tweets
+from tweet_model import Tweet, normalize_created_at
+from tweet_store import TweetStore
+
+# tweepy (and requests, through api_session) are only imported when the first API client
+# is created, so starting without credentials or from a saved snapshot doesn't pay for them
+TWEEPY_AVAILABLE = importlib.util.find_spec('tweepy') is not None
+if not TWEEPY_AVAILABLE:
+    print("Warning: tweepy not installed. Using mock data only.")
+tweepy = None
+RateLimitedClient = None
+
+def load_tweepy():
+    """Import tweepy and define RateLimitedClient on first use."""
+    global tweepy, RateLimitedClient
+    
+    if RateLimitedClient is not None:
+        return
+    
     import tweepy
-    TWEEPY_AVAILABLE = True
+    
+    class RateLimitedClient(tweepy.Client):
+        """tweepy Client that records every response's rate-limit headers in rate_limits.
+        
+        Each request's latency and status are also recorded for /metrics.
+        """
+        
+        def request(self, method, route, params=None, json=None, user_auth=False):
+            start = time.perf_counter()
+            status = 'error'
+            try:
+                response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+                status = response.status_code
+            except tweepy.HTTPException as e:
+                status = e.response.status_code
+                rate_limits.record(route, e.response.headers)
+                raise
+            finally:
+                endpoint = endpoint_key(route)
+                upstream_latency.observe(time.perf_counter() - start, endpoint=endpoint)
+                upstream_requests.inc(endpoint=endpoint, status=str(status))
+            rate_limits.record(route, response.headers)
+            return response
+
+# Brotli is optional; without it snapshots are only pre-compressed with gzip
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
 except ImportError:
-    TWEEPY_AVAILABLE = False
-    print("Warning: tweepy not installed. Using mock data only.")
+    BROTLI_AVAILABLE = False
 
 # Load environment variables from .env file
 load_dotenv()
@@ -31,157 +97,601 @@ TWITTER_CONSUMER_SECRET = os.getenv('TWITTER_CONSUMER_SECRET')
 TWITTER_ACCESS_TOKEN = os.getenv('TWITTER_ACCESS_TOKEN')
 TWITTER_ACCESS_TOKEN_SECRET = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
 
-# List of Twitter accounts to follow
-ACCOUNTS = [
-    'saylor',
-    'martypartymusic',
-    'RaoulGMI',
-    'Excellion',
-    'BitcoinMagazine',
-    'rektcapital',
-    'APompliano',
-    'BTC_Archive'
-]
+# Accounts to follow: ACCOUNTS_FILE if it exists, else the tweet store's accounts table, else the
+# defaults in accounts.py. The source is checked for changes at most every ACCOUNTS_RELOAD_INTERVAL.
+ACCOUNTS_FILE = os.getenv('ACCOUNTS_FILE', 'accounts.txt')
+ACCOUNTS_RELOAD_INTERVAL = int(os.getenv('ACCOUNTS_RELOAD_INTERVAL', '30'))
+
+class TweetJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes Tweet objects at the response boundary."""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, Tweet):
+            return o.to_json()
+        return DefaultJSONProvider.default(o)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = TweetJSONProvider(app)
 
 # Cache for tweet data to avoid rate limiting
-tweet_cache = {}
+tweet_cache = []
+tweets_by_user = {}  # username -> that account's slice of tweet_cache, newest first
+page_indexes = {}  # username (or ALL_ACCOUNTS_KEY) -> ascending sort keys for cursor pagination
+ALL_ACCOUNTS_KEY = '*'
+current_snapshot = None  # FeedSnapshot for the latest refresh
+snapshot_version = 0
+account_fetch_times = {}  # username -> when its slice was last fetched
+search_index = TweetSearchIndex()  # inverted index over tweet_cache for /tweets/search
 last_fetch_time = 0
 CACHE_DURATION = 300  # 5 minutes in seconds
 
+# Stale-while-revalidate settings (seconds of snapshot age)
+CACHE_SOFT_TTL = int(os.getenv('CACHE_SOFT_TTL', str(CACHE_DURATION)))  # background refresher renews past this
+CACHE_HARD_TTL = int(os.getenv('CACHE_HARD_TTL', str(CACHE_DURATION * 2)))  # requests trigger a refresh past this
+CACHE_MAX_STALENESS = int(os.getenv('CACHE_MAX_STALENESS', str(CACHE_DURATION * 6)))  # never served past this
+BACKGROUND_REFRESH = os.getenv('BACKGROUND_REFRESH', '1') != '0'
+_refresher_thread = None
+
+# Per-account views are served from the snapshot until this old, then that account alone is refetched
+ACCOUNT_CACHE_DURATION = int(os.getenv('ACCOUNT_CACHE_DURATION', str(CACHE_HARD_TTL)))
+_account_locks = {}
+
+# Server-Sent Events stream of newly merged tweets
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '100'))  # pending updates per client before it is dropped
+SSE_HEARTBEAT_INTERVAL = float(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))  # seconds between keep-alive comments
+SSE_REPLAY_SIZE = int(os.getenv('SSE_REPLAY_SIZE', '200'))  # recent updates kept for reconnecting clients
+
+# Adaptive polling: each refresh only polls accounts likely to have new tweets,
+# within the quota the API reports for the timeline endpoint
+TIMELINE_ENDPOINT = '/2/users/:id/tweets'
+POLL_MIN_INTERVAL = int(os.getenv('POLL_MIN_INTERVAL', str(CACHE_SOFT_TTL)))
+POLL_MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', str(2 * 3600)))
+RATE_LIMIT_RESERVE = float(os.getenv('RATE_LIMIT_RESERVE', '0.1'))  # fraction of each window kept back
+rate_limits = RateLimitTracker()
+poll_scheduler = PollScheduler(
+    TIMELINE_ENDPOINT,
+    min_interval=POLL_MIN_INTERVAL,
+    max_interval=POLL_MAX_INTERVAL,
+    refresh_interval=CACHE_SOFT_TTL,
+    reserve=RATE_LIMIT_RESERVE
+)
+
+# Cursor pagination for /tweets and /tweets/<username>
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '200'))
+
+# Only one refresh runs at a time; concurrent callers share its result
+_refresh_lock = threading.Lock()
+_publish_lock = threading.Lock()  # one snapshot publish at a time, so none overwrites a newer one
+_stats_lock = threading.Lock()
+cache_stats = {
+    'hits': 0,        # served from a fresh cache
+    'misses': 0,      # had to wait for a refresh (empty or too stale cache)
+    'stale': 0,       # served an expired snapshot while a refresh runs
+    'refreshes': 0,   # full refreshes actually run
+    'coalesced': 0,   # requests that arrived while a refresh was running
+}
+
+# Prometheus metrics served on /metrics (cache counters, quotas and snapshot size are read at scrape time)
+metrics_registry = MetricsRegistry()
+account_fetch_latency = metrics_registry.histogram(
+    'feed_account_fetch_seconds', 'Time to fetch one account, including fallbacks', ['account']
+)
+upstream_latency = metrics_registry.histogram(
+    'feed_upstream_request_seconds', 'Twitter API request latency', ['endpoint']
+)
+upstream_requests = metrics_registry.counter(
+    'feed_upstream_requests_total', 'Twitter API requests by response status', ['endpoint', 'status']
+)
+refresh_latency = metrics_registry.histogram(
+    'feed_refresh_seconds', 'Duration of full cache refreshes',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+fetch_errors = metrics_registry.counter(
+    'feed_fetch_errors_total', 'Account fetches that failed, by exception or timeout', ['account', 'reason']
+)
+mock_fallbacks = metrics_registry.counter(
+    'feed_mock_fallbacks_total', 'Times mock tweets were served in place of an account\'s timeline', ['account']
+)
+
+# Opt-in request profiling: send "X-Profile: 1" or ?profile=1 to get a Server-Timing header
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '1') != '0'
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '1.0'))  # fraction of opted-in requests traced
+PROFILE_DUMP_DIR = os.getenv('PROFILE_DUMP_DIR', '')  # cProfile dumps of slow traced requests; empty disables
+PROFILE_DUMP_LIMIT = int(os.getenv('PROFILE_DUMP_LIMIT', '20'))  # dumps kept on disk, oldest deleted first
+PROFILE_SLOW_THRESHOLD = float(os.getenv('PROFILE_SLOW_THRESHOLD', '0.5'))  # seconds
+profile_ring = ProfileRing(PROFILE_DUMP_DIR, PROFILE_DUMP_LIMIT) if PROFILE_DUMP_DIR else None
+_profiler_lock = threading.Lock()  # cProfile can only profile one request at a time
+
+# /analytics/engagement: NumPy columns over the snapshot's timelines, rebuilt once per snapshot version
+ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', '32'))  # distinct reports kept per snapshot
+engagement_columns = None  # EngagementColumns for engagement_version
+engagement_version = None
+_analytics_cache = {}  # report parameters -> serialized report for engagement_version
+_analytics_lock = threading.Lock()
+
+# Mock data used when the API isn't available
+MOCK_SEED = int(os.getenv('MOCK_SEED', str(DEFAULT_SEED)))
+MOCK_TWEETS_PER_ACCOUNT = 5
+_mock_timelines = {}  # username -> (hour it is anchored to, mock timeline)
+
+# Sharded refresh: each refresh polls one time shard, so every account is polled once per
+# CACHE_SOFT_TTL cycle while each refresh stays under MAX_ACCOUNTS_PER_REFRESH accounts
+MAX_ACCOUNTS_PER_REFRESH = int(os.getenv('MAX_ACCOUNTS_PER_REFRESH', '100'))
+REFRESH_SHARDS = int(os.getenv('REFRESH_SHARDS', '0'))  # fixed shard count; 0 sizes shards from the above
+# Worker processes sharing the accounts: each fetches its own share and reads the rest from the tweet store.
+# Ignored with a shared cache, whose one elected leader fetches every account (see apply_accounts).
+WORKER_COUNT = int(os.getenv('WORKER_COUNT', '1'))
+WORKER_INDEX = int(os.getenv('WORKER_INDEX', '0'))
+shard_plan = []  # per time shard: (accounts this worker fetches, accounts read from the store)
+refresh_cycle = 0  # refreshes run so far; refresh n polls time shard n % len(shard_plan)
+
+# Concurrent fetch settings
+FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY', '8'))  # max accounts fetched at once
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', '10'))  # seconds allowed per account
+
+# Worker pool shared by all refreshes (created on first use)
+_fetch_executor = None
+
+# One API client per process, on a keep-alive connection pool sized to FETCH_CONCURRENCY
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+TWITTER_API_BASE_URL = os.getenv('TWITTER_API_BASE_URL')  # e.g. a local fake_twitter_api.py server
+twitter_client = None
+_client_lock = threading.Lock()
+
+# Username -> user id resolution cache (ids practically never change)
+USER_ID_CACHE_FILE = os.getenv('USER_ID_CACHE_FILE', 'user_ids.json')
+USER_ID_CACHE_TTL = int(os.getenv('USER_ID_CACHE_TTL', str(7 * 24 * 3600)))  # 1 week in seconds
+USERS_LOOKUP_BATCH_SIZE = 100  # max usernames per users lookup request
+user_id_cache = {}  # lowercase username -> {'id': ..., 'resolved_at': ...}
+_user_id_cache_loaded = False
+_user_id_lock = threading.Lock()
+
+# Per-account timelines kept between refreshes so each poll only asks for newer tweets
+MAX_TWEETS_PER_ACCOUNT = int(os.getenv('MAX_TWEETS_PER_ACCOUNT', '200'))
+# since_id polls page back until they reach since_id, but no further than a timeline holds
+POLL_PAGE_SIZE = 100  # max_results of incremental polls (the API's maximum)
+MAX_POLL_PAGES = max(1, math.ceil(MAX_TWEETS_PER_ACCOUNT / POLL_PAGE_SIZE))
+account_timelines = {}  # username -> tweets, newest first
+since_ids = {}  # username -> id of the newest tweet seen (high-water mark)
+_timeline_lock = threading.Lock()
+
+# Local SQLite store for every tweet fetched from the API (set TWEET_DB_PATH='' to disable)
+TWEET_DB_PATH = os.getenv('TWEET_DB_PATH', 'tweets.db')
+tweet_store = None
+_store_warmed = False
+
+# Cross-worker cache: one elected worker refreshes and the others adopt its published snapshots.
+# The published snapshot also outlives restarts, so a new process starts from it instead of cold.
+SHARED_CACHE_BACKEND = os.getenv('SHARED_CACHE_BACKEND', '')  # 'mmap' or 'sqlite'; empty (the default) keeps the cache per process
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', 'feed_snapshot')  # snapshot file or database (plus a .lock file)
+SHARED_CACHE_POLL_INTERVAL = float(os.getenv('SHARED_CACHE_POLL_INTERVAL', '1'))  # seconds between version checks
+SHARED_CACHE_WAIT = float(os.getenv('SHARED_CACHE_WAIT', '30'))  # max seconds to wait for the leader's first snapshot
+shared_cache = None
+shared_version = None  # version of the shared snapshot last adopted or published by this worker
+_shared_sync_started = False
+_shared_sync_lock = threading.Lock()
+_snapshot_published = threading.Event()
+if SHARED_CACHE_BACKEND:
+    try:
+        shared_cache = SharedCache(SHARED_CACHE_BACKEND, SHARED_CACHE_PATH)
+    except Exception as e:
+        print(f"Error opening shared cache: {e}")
+    if shared_cache is not None and WORKER_COUNT > 1:
+        print("WORKER_COUNT/WORKER_INDEX are ignored with a shared cache: its leader fetches every account")
+
 def get_twitter_client():
-    """Initialize and return the Twitter API client if credentials are available."""
+    """Return the process-wide Twitter API client if credentials are available.
+    
+    The client is created once and reuses a pooled keep-alive session, so API
+    calls don't pay for a new connection and TLS handshake each time.
+    """
+    global twitter_client
+    
     if not TWEEPY_AVAILABLE:
         return None
         
     if not TWITTER_BEARER_TOKEN:
         return None
     
+    if twitter_client is not None:
+        return twitter_client
+    
+    with _client_lock:
+        if twitter_client is None:
+            try:
+                from api_session import ApiSession
+                load_tweepy()
+                client = RateLimitedClient(
+                    bearer_token=TWITTER_BEARER_TOKEN,
+                    consumer_key=TWITTER_CONSUMER_KEY,
+                    consumer_secret=TWITTER_CONSUMER_SECRET,
+                    access_token=TWITTER_ACCESS_TOKEN,
+                    access_token_secret=TWITTER_ACCESS_TOKEN_SECRET
+                )
+                client.session = ApiSession(
+                    pool_size=max(1, FETCH_CONCURRENCY),
+                    connect_timeout=HTTP_CONNECT_TIMEOUT,
+                    read_timeout=HTTP_READ_TIMEOUT,
+                    retries=HTTP_RETRIES,
+                    backoff_factor=HTTP_BACKOFF_FACTOR,
+                    base_url=TWITTER_API_BASE_URL
+                )
+                twitter_client = client
+            except Exception as e:
+                print(f"Error initializing Twitter client: {e}")
+                return None
+    return twitter_client
+
+def load_user_id_cache():
+    """Load unexpired username -> id entries from disk into user_id_cache."""
+    global _user_id_cache_loaded
+    
+    _user_id_cache_loaded = True
     try:
-        client = tweepy.Client(
-            bearer_token=TWITTER_BEARER_TOKEN,
-            consumer_key=TWITTER_CONSUMER_KEY,
-            consumer_secret=TWITTER_CONSUMER_SECRET,
-            access_token=TWITTER_ACCESS_TOKEN,
-            access_token_secret=TWITTER_ACCESS_TOKEN_SECRET
-        )
-        return client
-    except Exception as e:
-        print(f"Error initializing Twitter client: {e}")
-        return None
+        with open(USER_ID_CACHE_FILE) as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        print(f"Error loading user id cache: {e}")
+        return
+    
+    now = time.time()
+    for username, entry in entries.items():
+        if now - entry.get('resolved_at', 0) < USER_ID_CACHE_TTL:
+            user_id_cache[username] = entry
 
-def generate_mock_tweets(username):
-    """Generate mock tweets for a specific user when API access isn't available."""
-    # User-specific mock content
-    user_content = {
-        'saylor': [
-            "Bitcoin is digital energy. Energy is the fundamental unit of the physical universe. #Bitcoin is the fundamental unit of the monetary universe.",
-            "There is no second best. #Bitcoin is the apex digital monetary asset of the human race.",
-            "If you're going to invest in Bitcoin, a long time horizon is advantageous. I recommend a century.",
-            "$BTC is hope for billions of people that need a treasury that cannot be debased or seized.",
-            "The network effect of #Bitcoin increases with each new hodler. The future is digital gold."
-        ],
-        'martypartymusic': [
-            "The beauty of Bitcoin is that it empowers individuals to be their own bank. No trust necessary. #BTCRevolution",
-            "Just stacked more sats! Dollar cost averaging into #Bitcoin is the way. Keep building your position in sound money.",
-            "People still don't realize how early we are in the Bitcoin adoption curve. Less than 2% global penetration.",
-            "The Bitcoin halving is going to shock everyone who's not prepared. Supply shock incoming!",
-            "True financial freedom comes from holding your own keys and being sovereign. Not your keys, not your coins. #Bitcoin"
-        ],
-        'RaoulGMI': [
-            "Bitcoin and digital assets are the greatest growth opportunity of our lifetime. The upside is almost unquantifiable.",
-            "Institutions are slowly realizing that they can't afford NOT to have Bitcoin in their portfolios. The Great Reallocation is coming.",
-            "Smart money is already positioned for the next leg up in Bitcoin. Are you?",
-            "The bitcoin network is becoming the world's most secure and valuable consensus network. The implications are enormous.",
-            "Liquidity drives all asset prices. And the bitcoin liquidity structure is extremely bullish right now."
-        ],
-        'Excellion': [
-            "Layer 2 solutions will bring Bitcoin to billions. The base layer must remain simple and secure.",
-            "Nation state Bitcoin adoption is happening faster than anyone expected. Game theory in action.",
-            "Mining with renewable energy is the future of #Bitcoin - abundant energy creating sound money.",
-            "Don't trust, verify. Run a node. Be sovereign. This is the way. #Bitcoin",
-            "As fiat currencies continue to be debased, Bitcoin continues to shine as the hardest money ever created."
-        ],
-        'BitcoinMagazine': [
-            "BREAKING: Major European bank launches Bitcoin custody services for institutional clients.",
-            "10 years ago today, Bitcoin was trading at $250. Today it's over $100,000.",
-            "El Salvador's Bitcoin strategy proves successful as tourism increases 30% year over year.",
-            "MicroStrategy announces acquisition of an additional 8,420 BTC, bringing total holdings to over 200,000 bitcoin.",
-            "New data from Glassnode shows Bitcoin illiquid supply has reached an all-time high of 78% of circulating supply."
-        ],
-        'rektcapital': [
-            "Bitcoin is looking incredibly strong on the Monthly chart. Higher lows pattern intact on the uptrend.",
-            "#BTC price confirmed a breakout from this multi-month structure. Target: $125,000",
-            "The $BTC Fear & Greed Index is showing Extreme Greed. Be cautious short-term, but the macro bull market remains intact.",
-            "The weekly RSI on Bitcoin is NOT in overbought territory yet. Still room to grow in this rally.",
-            "Bitcoin's new All-Time High will catch many investors off guard who've been waiting for a bigger dip to buy."
-        ],
-        'APompliano': [
-            "Bitcoin is the only truly scarce digital asset. Everything else can be replicated, copied, or outdated.",
-            "The Lightning Network is growing exponentially. Bitcoin as a payment network is now a reality.",
-            "More than 250 million people now have exposure to Bitcoin through ETFs. Mass adoption is coming.",
-            "The Federal Reserve continues to destroy the value of the dollar. Bitcoin fixes this.",
-            "Prediction: Bitcoin will be recognized as the global reserve asset by 2030."
-        ],
-        'BTC_Archive': [
-            "JUST IN: Switzerland approves new Bitcoin spot ETF, opening doors for broader European adoption.",
-            "BREAKING: Major sovereign wealth fund reveals 1% allocation to Bitcoin, worth over $5 billion.",
-            "Bitcoin miners earned over $45 million in a single day - a new all-time high.",
-            "This chart shows Bitcoin adoption is growing faster than the internet did in the 1990s.",
-            "Over 85% of the Bitcoin supply hasn't moved in the last 3 months. Hodlers are staying strong."
+def save_user_id_cache():
+    """Write user_id_cache to disk atomically."""
+    tmp_path = f"{USER_ID_CACHE_FILE}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(user_id_cache, f)
+        os.replace(tmp_path, USER_ID_CACHE_FILE)
+    except OSError as e:
+        print(f"Error saving user id cache: {e}")
+
+def resolve_user_ids(client, usernames):
+    """Return a {username: user_id} map, batching lookups for unknown usernames.
+    
+    Cached ids are reused until USER_ID_CACHE_TTL expires; everything else is
+    resolved with one users lookup per USERS_LOOKUP_BATCH_SIZE usernames.
+    Usernames the API can't resolve are left out of the result.
+    """
+    with _user_id_lock:
+        if not _user_id_cache_loaded:
+            load_user_id_cache()
+        
+        now = time.time()
+        missing = [
+            username for username in usernames
+            if now - user_id_cache.get(username.lower(), {}).get('resolved_at', 0) >= USER_ID_CACHE_TTL
         ]
-    }
+        
+        if missing:
+            for start in range(0, len(missing), USERS_LOOKUP_BATCH_SIZE):
+                batch = missing[start:start + USERS_LOOKUP_BATCH_SIZE]
+                users_response = client.get_users(usernames=batch)
+                for user in getattr(users_response, 'data', None) or []:
+                    user_id_cache[user.username.lower()] = {'id': user.id, 'resolved_at': now}
+            save_user_id_cache()
+        
+        return {
+            username: user_id_cache[username.lower()]['id']
+            for username in usernames
+            if username.lower() in user_id_cache
+        }
+
+def invalidate_user_id(username):
+    """Forget a cached user id so the next fetch resolves it again."""
+    with _user_id_lock:
+        if user_id_cache.pop(username.lower(), None) is not None:
+            save_user_id_cache()
+
+def tweet_sort_key(tweet):
+    """Return the (epoch seconds, numeric id) key tweets are ordered and paginated by."""
+    return tweet.sort_key
+
+def build_page_index(tweets):
+    """Return ascending sort keys for a newest-first list, for bisecting cursors."""
+    return [tweet_sort_key(tweet) for tweet in reversed(tweets)]
+
+def splice(items, edits):
+    """Return a copy of items with edits applied, copying unchanged runs as slices.
     
-    # Default content for any username not in our predefined list
-    default_content = [
-        "Bitcoin is the future of money. The revolution continues. #BTC",
-        "Just added more Bitcoin to my long-term holdings. You should too.",
-        "The fundamentals of Bitcoin have never been stronger.",
-        "HODL and prosper. This is financial freedom.",
-        "Sound money for a digital age. Bitcoin is inevitable."
-    ]
+    edits are (position, remove, item) in position order: remove drops the item
+    at position, otherwise item is inserted before it.
+    """
+    result = []
+    start = 0
+    for position, remove, item in edits:
+        result.extend(items[start:position])
+        if remove:
+            start = position + 1
+        else:
+            result.append(item)
+            start = position
+    result.extend(items[start:])
+    return result
+
+class TweetBroadcaster:
+    """Fans newly merged tweets out to every /tweets/stream subscriber.
     
-    # Get content for the specific user
-    contents = user_content.get(username, default_content)
-    
-    # Generate 3-5 tweets for the user
-    tweet_count = random.randint(3, 5)
-    mock_tweets = []
-    
-    current_time = datetime.now()
-    
-    for i in range(tweet_count):
-        # Random time in the past week
-        hours_ago = random.randint(1, 168)  # Up to 1 week
-        tweet_time = current_time - timedelta(hours=hours_ago)
-        
-        # Random content
-        content = random.choice(contents)
-        
-        # Random metrics
-        like_count = random.randint(500, 10000)
-        retweet_count = random.randint(100, 2000)
-        reply_count = random.randint(50, 500)
-        
-        # Create tweet
-        tweet = {
-            'id': f"mock-{username}-{i}-{int(time.time())}",
-            'text': content,
-            'created_at': tweet_time,
-            'username': username,
-            'metrics': {
-                'like_count': like_count,
-                'retweet_count': retweet_count,
-                'reply_count': reply_count
-            },
-            'media_urls': []
-        }
+    Each update is serialized once, numbered with the next sequence number (its
+    SSE event id) and put on every subscriber's bounded queue. A client whose
+    queue is full is disconnected instead of holding up the others; its
+    EventSource reconnects with Last-Event-ID and is replayed the updates after
+    it from the last replay_size updates.
+    """
+    
+    def __init__(self, queue_size, replay_size):
+        self.queue_size = queue_size
+        self.sequence = 0
+        self._replay = deque(maxlen=replay_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+    
+    def subscribe(self, last_event_id=None):
+        """Add a subscriber and return (queue, backlog) for a client resuming after last_event_id.
         
-        mock_tweets.append(tweet)
+        The backlog is the logged messages after last_event_id, or a single
+        `reset` message if that id is unknown or no longer in the replay log.
+        Subscribing and reading the log happen under one lock, so no update
+        falls between the backlog and the queue.
+        """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            backlog = self._backlog(last_event_id) if last_event_id else []
+        return subscriber, backlog
     
-    return mock_tweets
+    def _backlog(self, last_event_id):
+        try:
+            last_seen = int(last_event_id)
+        except ValueError:
+            return [format_sse_reset(self.sequence)]
+        if last_seen == self.sequence:
+            return []
+        oldest = self._replay[0][0] if self._replay else self.sequence + 1
+        if last_seen > self.sequence or last_seen < oldest - 1:
+            # From before a restart, or missed updates that have left the log
+            return [format_sse_reset(self.sequence)]
+        return [message for sequence, message in self._replay if sequence > last_seen]
+    
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+    
+    def publish(self, tweets):
+        """Send tweets (newest first) to every subscriber as one SSE message, and log it for replay."""
+        if not tweets:
+            return
+        with self._lock:
+            self.sequence += 1
+            message = format_sse_message(self.sequence, tweets)
+            self._replay.append((self.sequence, message))
+            # Queued under the lock so every subscriber gets updates in sequence order
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # Too slow to keep up: drop the backlog and tell its stream to close
+                    self._subscribers.discard(subscriber)
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait(None)
+
+def format_sse_message(sequence, tweets):
+    """Encode tweets (newest first) as a `tweets` event with the publish sequence number as its id."""
+    data = app.json.dumps(tweets, separators=(',', ':'))
+    return f"id: {sequence}\nevent: tweets\ndata: {data}\n\n"
+
+def format_sse_reset(sequence):
+    """Encode a `reset` event telling the client to reload; the id is the current sequence number."""
+    return f"id: {sequence}\nevent: reset\ndata: {{}}\n\n"
+
+broadcaster = TweetBroadcaster(SSE_QUEUE_SIZE, SSE_REPLAY_SIZE)
+
+def get_tweet_store():
+    """Open the tweet store on first use, or return None if it is disabled or unavailable."""
+    global tweet_store, TWEET_DB_PATH
+    
+    if tweet_store is None and TWEET_DB_PATH:
+        try:
+            tweet_store = TweetStore(TWEET_DB_PATH)
+        except Exception as e:
+            print(f"Error opening tweet store: {e}")
+            TWEET_DB_PATH = None
+    return tweet_store
+
+# Followed accounts; refreshes pick up changes to their source
+account_registry = AccountRegistry(ACCOUNTS_FILE, get_tweet_store, ACCOUNTS_RELOAD_INTERVAL)
+ACCOUNTS = []
+
+def apply_accounts(accounts):
+    """Follow accounts: forget removed ones and re-plan the refresh shards."""
+    global ACCOUNTS, shard_plan
+    
+    removed = set(ACCOUNTS) - set(accounts)
+    with _timeline_lock:
+        for username in removed:
+            account_timelines.pop(username, None)
+            since_ids.pop(username, None)
+    
+    shards = REFRESH_SHARDS or max(1, math.ceil(len(accounts) / MAX_ACCOUNTS_PER_REFRESH))
+    if shared_cache is not None:
+        # Only the elected leader refreshes, and whichever worker it is must cover every account
+        shard_plan = plan_shards(accounts, shards)
+    else:
+        shard_plan = plan_shards(accounts, shards, WORKER_COUNT, WORKER_INDEX)
+    # The poll budget is shared between every refresh in the rate-limit window
+    poll_scheduler.refresh_interval = CACHE_SOFT_TTL / shards
+    ACCOUNTS = accounts
+
+apply_accounts(account_registry.accounts)
+
+def update_accounts():
+    """Reload the followed accounts if their source changed."""
+    if account_registry.refresh():
+        apply_accounts(account_registry.accounts)
+        print(f"Now following {len(ACCOUNTS)} accounts (from {account_registry.source})")
+
+def next_refresh_shard():
+    """Return (owned, foreign, last) for the time shard the next refresh polls.
+    
+    last is whether it is the last shard of the cycle, so that once it is
+    refreshed every account has been.
+    """
+    global refresh_cycle
+    
+    with _stats_lock:
+        plan = shard_plan
+        owned, foreign = plan[refresh_cycle % len(plan)]
+        refresh_cycle += 1
+        last = refresh_cycle % len(plan) == 0
+    return owned, foreign, last
+
+def read_foreign_timelines(usernames):
+    """Load accounts fetched by other workers from the shared tweet store into account_timelines."""
+    store = get_tweet_store()
+    if not store:
+        return {}
+    try:
+        timelines = store.recent_tweets_by_user(usernames, MAX_TWEETS_PER_ACCOUNT)
+    except Exception as e:
+        print(f"Error reading timelines from tweet store: {e}")
+        return {}
+    with _timeline_lock:
+        for username, timeline in timelines.items():
+            # Keep the list already held if the store has nothing new, so it still counts as unchanged
+            previous = account_timelines.get(username)
+            if previous is not None and [tweet.pack() for tweet in previous] == [tweet.pack() for tweet in timeline]:
+                timelines[username] = previous
+            else:
+                account_timelines[username] = timeline
+    return timelines
+
+def warm_from_store():
+    """Load the newest stored tweets into the cache so a restart doesn't begin cold.
+    
+    The warmed snapshot is published as already expired: the first request is
+    answered from it straight away while a refresh brings it up to date.
+    """
+    global _store_warmed
+    
+    _store_warmed = True
+    store = get_tweet_store()
+    if not store or tweet_cache:
+        return
+    
+    try:
+        stored_since_ids = store.since_ids()
+        by_user = store.recent_tweets_by_user(ACCOUNTS, MAX_TWEETS_PER_ACCOUNT)
+    except Exception as e:
+        print(f"Error warming cache from tweet store: {e}")
+        return
+    
+    with _timeline_lock:
+        for username, timeline in by_user.items():
+            if timeline:
+                account_timelines.setdefault(username, timeline)
+                since_ids.setdefault(username, stored_since_ids[username])
+    
+    # Each stored timeline is already newest first, so a k-way merge is enough
+    all_tweets = list(heapq.merge(*by_user.values(), key=tweet_sort_key, reverse=True))
+    if not all_tweets:
+        return
+    
+    with _publish_lock:
+        publish_snapshot(all_tweets, by_user, time.time() - CACHE_HARD_TTL)
+
+def merge_timeline(username, new_tweets):
+    """Merge freshly fetched tweets into an account's timeline and return it.
+    
+    Tweets are deduplicated by id, kept newest first and capped at
+    MAX_TWEETS_PER_ACCOUNT. The account's since_id advances to the newest id seen,
+    the new tweets are saved to the tweet store and tweets not seen before are
+    pushed to /tweets/stream subscribers.
+    
+    The returned list is the one kept in account_timelines, and it is published
+    as is, so it must not be modified. Without new tweets the same list is
+    returned again, which is how publishing, search and analytics tell that the
+    account didn't change.
+    """
+    with _timeline_lock:
+        timeline = account_timelines.get(username, [])
+        known_ids = {tweet.id for tweet in timeline}
+        if new_tweets:
+            new_tweets = sorted(new_tweets, key=tweet_sort_key, reverse=True)
+            seen_ids = {tweet.id for tweet in new_tweets}
+            older = [tweet for tweet in timeline if tweet.id not in seen_ids]
+            merged = heapq.merge(new_tweets, older, key=tweet_sort_key, reverse=True)
+            timeline = list(itertools.islice(merged, MAX_TWEETS_PER_ACCOUNT))
+            
+            newest_id = max(int(tweet.id) for tweet in new_tweets)
+            since_ids[username] = max(newest_id, since_ids.get(username, 0))
+        
+        account_timelines[username] = timeline
+    
+    store = get_tweet_store()
+    if store and new_tweets:
+        try:
+            store.upsert_tweets(new_tweets)
+        except Exception as e:
+            print(f"Error saving tweets for {username}: {e}")
+    
+    # Push tweets we haven't seen before to live /tweets/stream clients
+    broadcaster.publish([tweet for tweet in new_tweets if tweet.id not in known_ids])
+    
+    return timeline
+
+def generate_mock_tweets(username):
+    """Generate mock tweets for a specific user when API access isn't available.
+    
+    Mock timelines come from the seeded synthetic generator and are anchored to
+    the current hour, so repeated refreshes return the same tweets and ids (in
+    the same list, so the account doesn't count as changed).
+    """
+    mock_fallbacks.inc(account=username)
+    end_ts = int(time.time()) // 3600 * 3600
+    cached = _mock_timelines.get(username)
+    if cached is not None and cached[0] == end_ts:
+        return cached[1]
+    timeline = list(iter_account_tweets(username, MOCK_TWEETS_PER_ACCOUNT, MOCK_SEED, end_ts))
+    _mock_timelines[username] = (end_ts, timeline)
+    return timeline
+
+def index_includes(includes):
+    """Index a timeline response's expansions by key.
+    
+    Returns (media_key -> media URL, tweet id -> included tweet, user id -> username)
+    so expanding each tweet is a dictionary lookup rather than a scan of includes.
+    """
+    if includes is None:
+        includes = {}
+    elif not isinstance(includes, dict):
+        includes = vars(includes)
+    
+    media_urls = {}
+    for media in includes.get('media') or []:
+        media_url = getattr(media, 'url', None) or getattr(media, 'preview_image_url', None)
+        if media_url:
+            media_urls[media.media_key] = media_url
+    
+    included_tweets = {tweet.id: tweet for tweet in includes.get('tweets') or []}
+    included_usernames = {user.id: user.username for user in includes.get('users') or []}
+    
+    return media_urls, included_tweets, included_usernames
 
 def fetch_user_tweets(username):
     """Fetch tweets for a specific user."""
@@ -192,78 +702,819 @@ def fetch_user_tweets(username):
         return generate_mock_tweets(username)
     
     try:
-        # Get user ID from username
-        user_response = client.get_user(username=username)
-        if not user_response or not hasattr(user_response, 'data') or not user_response.data:
+        # Get user ID from username (served from the resolution cache when possible)
+        with stage('resolve_ids'):
+            user_id = resolve_user_ids(client, [username]).get(username)
+        if user_id is None:
             return generate_mock_tweets(username)
         
-        user_id = user_response.data.id
+        # Get tweets newer than the last one we've seen (or the most recent ones). An
+        # incremental poll follows next_token back to since_id before anything is merged,
+        # so a burst of more than one page can't leave a gap below the advanced since_id.
+        params = {'max_results': 10}
+        if username in since_ids:
+            params = {'max_results': POLL_PAGE_SIZE, 'since_id': since_ids[username]}
+        responses = []
+        while True:
+            with stage('upstream'):
+                tweets_response = client.get_users_tweets(
+                    id=user_id,
+                    tweet_fields=['created_at', 'public_metrics', 'text', 'referenced_tweets', 'author_id'],
+                    expansions=['attachments.media_keys', 'referenced_tweets.id', 'referenced_tweets.id.author_id'],
+                    media_fields=['url', 'preview_image_url'],
+                    user_fields=['username'],
+                    **params
+                )
+            responses.append(tweets_response)
+            next_token = (getattr(tweets_response, 'meta', None) or {}).get('next_token')
+            if 'since_id' not in params or not next_token:
+                break
+            if len(responses) >= MAX_POLL_PAGES:
+                # The rest is older than anything the timeline would keep
+                print(f"Stopped paging {username} after {len(responses)} pages of new tweets")
+                break
+            params['pagination_token'] = next_token
         
-        # Get recent tweets from user
-        tweets_response = client.get_users_tweets(
-            id=user_id,
-            max_results=10,
-            tweet_fields=['created_at', 'public_metrics', 'text'],
-            expansions=['attachments.media_keys'],
-            media_fields=['url', 'preview_image_url']
-        )
+        new_count = sum(len(getattr(response, 'data', None) or []) for response in responses)
+        poll_scheduler.record_poll(username, new_count)
         
-        if not tweets_response or not hasattr(tweets_response, 'data') or not tweets_response.data:
+        if not new_count:
+            # Nothing new since the last poll: keep serving what we already have
+            if username in account_timelines:
+                return merge_timeline(username, [])
             return generate_mock_tweets(username)
         
-        # Process tweets
-        processed_tweets = []
-        for tweet in tweets_response.data:
-            tweet_data = {
-                'id': tweet.id,
-                'text': tweet.text,
-                'created_at': tweet.created_at,
-                'username': username,
-                'metrics': tweet.public_metrics,
-                'media_urls': []
-            }
-            
-            # Add media if available
-            if hasattr(tweet, 'attachments') and tweet.attachments and hasattr(tweets_response, 'includes'):
-                media_keys = tweet.attachments.get('media_keys', [])
-                if hasattr(tweets_response.includes, 'media'):
-                    for media in tweets_response.includes.media:
-                        if media.media_key in media_keys:
-                            media_url = getattr(media, 'url', None) or getattr(media, 'preview_image_url', None)
-                            if media_url:
-                                tweet_data['media_urls'].append(media_url)
-            
-            processed_tweets.append(tweet_data)
+        with stage('expand'):
+            processed_tweets = []
+            for response in responses:
+                processed_tweets.extend(expand_timeline_page(response, username))
         
-        return processed_tweets
+        with stage('timeline_merge'):
+            return merge_timeline(username, processed_tweets)
     
     except Exception as e:
+        # A stale or wrong id shows up as a not-found/bad request; resolve it again next time
+        if isinstance(e, (tweepy.NotFound, tweepy.BadRequest)):
+            invalidate_user_id(username)
+        fetch_errors.inc(account=username, reason=type(e).__name__)
         print(f"Error fetching tweets for {username}: {str(e)}")
+        # Keep serving the account's real timeline (e.g. while rate limited) if we have one
+        if username in account_timelines:
+            return merge_timeline(username, [])
         return generate_mock_tweets(username)
 
+def expand_timeline_page(tweets_response, username):
+    """Turn one page of a user timeline response into Tweets, with media and references expanded."""
+    # Index the expansions once so each tweet's lookups are constant time
+    media_urls, included_tweets, included_usernames = index_includes(
+        getattr(tweets_response, 'includes', None)
+    )
+    
+    # Process tweets
+    processed_tweets = []
+    for tweet in getattr(tweets_response, 'data', None) or []:
+        # Add media if available
+        attachments = getattr(tweet, 'attachments', None) or {}
+        tweet_media = [
+            media_urls[media_key]
+            for media_key in attachments.get('media_keys', [])
+            if media_key in media_urls
+        ]
+        
+        # Add quoted / replied-to / retweeted tweets if available
+        references = []
+        for referenced in getattr(tweet, 'referenced_tweets', None) or []:
+            included = included_tweets.get(referenced.id)
+            references.append({
+                'type': referenced.type,
+                'id': str(referenced.id),
+                'text': included.text if included else None,
+                'username': included_usernames.get(getattr(included, 'author_id', None))
+            })
+        
+        processed_tweets.append(Tweet.create(
+            id=tweet.id,
+            text=tweet.text,
+            created_at=tweet.created_at,
+            username=username,
+            metrics=tweet.public_metrics,
+            media_urls=tweet_media,
+            referenced_tweets=references
+        ))
+    return processed_tweets
+
+def get_fetch_executor():
+    """Return the shared worker pool used to fetch accounts concurrently."""
+    global _fetch_executor
+    
+    if _fetch_executor is None:
+        _fetch_executor = ThreadPoolExecutor(
+            max_workers=max(1, FETCH_CONCURRENCY),
+            thread_name_prefix='tweet-fetch'
+        )
+    return _fetch_executor
+
+def fetch_accounts_concurrently(usernames, fetch=None):
+    """Fetch tweets for several accounts in parallel, collecting them as they finish.
+    
+    At most FETCH_CONCURRENCY accounts are in flight at once and each account gets
+    FETCH_TIMEOUT seconds from the moment a worker picks it up, so a cold refresh
+    costs roughly the slowest account rather than the sum of all of them. Accounts
+    that fail or time out fall back to mock data, matching fetch_user_tweets.
+    
+    Returns {username: timeline (newest first)} in the order usernames were given.
+    """
+    fetch = fetch or fetch_user_tweets
+    usernames = list(usernames)
+    results = dict.fromkeys(usernames)
+    if not usernames:
+        return results
+    
+    started = {}
+    
+    def run(username):
+        started[username] = time.monotonic()
+        with account_fetch_latency.time(account=username):
+            return fetch(username)
+    
+    # Each worker runs in a copy of the caller's context so it records into a traced request's stages
+    executor = get_fetch_executor()
+    futures = {
+        executor.submit(contextvars.copy_context().run, run, username): username
+        for username in usernames
+    }
+    
+    pending = set(futures)
+    while pending:
+        # Wake up when something finishes or the oldest running account is due
+        now = time.monotonic()
+        deadlines = [started[futures[f]] + FETCH_TIMEOUT for f in pending if futures[f] in started]
+        timeout = max(0, min(deadlines) - now) if deadlines else FETCH_TIMEOUT
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            username = futures[future]
+            try:
+                results[username] = future.result()
+            except Exception as e:
+                fetch_errors.inc(account=username, reason=type(e).__name__)
+                print(f"Error fetching tweets for {username}: {str(e)}")
+                results[username] = generate_mock_tweets(username)
+        
+        now = time.monotonic()
+        for future in list(pending):
+            username = futures[future]
+            if username in started and now - started[username] >= FETCH_TIMEOUT:
+                pending.discard(future)
+                fetch_errors.inc(account=username, reason='timeout')
+                print(f"Timed out fetching tweets for {username} after {FETCH_TIMEOUT}s")
+                results[username] = generate_mock_tweets(username)
+    
+    return results
+
+class FeedSnapshot:
+    """Immutable, pre-serialized first page of /tweets for one published refresh.
+    
+    The JSON body and its compressed variants are encoded once when the snapshot
+    is published, so requests for the default page never serialize anything.
+    Snapshots adopted from the shared cache arrive already encoded. by_user is
+    the per-account timelines the snapshot was published from, so a reader
+    holding one snapshot sees timelines that match its version.
+    """
+    
+    def __init__(self, version, body, etag, headers, encoded, by_user):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self.headers = headers
+        self.encoded = encoded
+        self.by_user = by_user
+    
+    @classmethod
+    def build(cls, version, page, headers, by_user):
+        """Serialize and compress a page of tweets."""
+        body = app.json.dumps(page, separators=(',', ':')).encode('utf-8')
+        encoded = {'gzip': gzip.compress(body, compresslevel=6)}
+        if BROTLI_AVAILABLE:
+            encoded['br'] = brotli.compress(body)
+        return cls(version, body, f"{version}-{hashlib.sha1(body).hexdigest()[:16]}", headers, encoded, by_user)
+    
+    def response(self):
+        """Return the pre-built response for the current request, or a 304."""
+        if request.if_none_match.contains_weak(self.etag):
+            response = Response(status=304)
+        else:
+            encoding = choose_encoding(self.encoded)
+            body = self.encoded[encoding] if encoding else self.body
+            response = Response(body, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            response.headers.update(self.headers)
+        
+        response.set_etag(self.etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+def choose_encoding(available):
+    """Pick the client's most preferred encoding we have a pre-compressed body for."""
+    best, best_quality = None, 0
+    for encoding in ('br', 'gzip'):
+        quality = request.accept_encodings[encoding]
+        if encoding in available and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def publish_snapshot(all_tweets, by_user, fetched_at, fetched=None, snapshot=None, index=None):
+    """Publish a newly built timeline: cache, per-account index, page indexes and snapshot.
+    
+    fetched lists the accounts refreshed for it (all of by_user by default).
+    snapshot is the already serialized first page, for timelines adopted from
+    the shared cache, and index all_tweets' page index if it is already built
+    (see merge_changed_timelines).
+    """
+    global tweet_cache, tweets_by_user, last_fetch_time, current_snapshot, snapshot_version
+    
+    publish_page_indexes(all_tweets, by_user, index)
+    search_index.sync(all_tweets, by_user)
+    
+    if snapshot is None:
+        # Build the default /tweets page exactly as paginated_response would
+        index = page_indexes[ALL_ACCOUNTS_KEY]
+        page, older_cursor, _ = paginate(
+            all_tweets, index, DEFAULT_PAGE_SIZE, usernames=list(by_user),
+            horizon=history_horizon(list(by_user))
+        )
+        headers = {}
+        if older_cursor:
+            headers['X-Next-Cursor'] = older_cursor
+            headers['Link'] = f'</tweets?limit={DEFAULT_PAGE_SIZE}&before={older_cursor}>; rel="next"'
+        snapshot_version += 1
+        snapshot = FeedSnapshot.build(snapshot_version, page, headers, by_user)
+    
+    tweets_by_user = by_user
+    account_fetch_times.update(dict.fromkeys(by_user if fetched is None else fetched, fetched_at))
+    tweet_cache = all_tweets
+    current_snapshot = snapshot
+    last_fetch_time = fetched_at
+    _snapshot_published.set()
+
+def share_snapshot(all_tweets, by_user):
+    """Publish the current snapshot to the shared cache for the other workers (leader only)."""
+    global shared_version
+    
+    snapshot = current_snapshot
+    sections = {'body': snapshot.body, **snapshot.encoded}
+    sections['tweets'] = json.dumps([tweet.pack() for tweet in all_tweets], separators=(',', ':')).encode('utf-8')
+    meta = {
+        'fetched_at': last_fetch_time,
+        'etag': snapshot.etag,
+        'headers': snapshot.headers,
+        'accounts': list(by_user),
+    }
+    try:
+        shared_cache.publish(snapshot.version, meta, sections)
+        shared_version = snapshot.version
+    except Exception as e:
+        print(f"Error publishing shared snapshot: {e}")
+
+def adopt_shared_snapshot():
+    """Publish the shared snapshot locally if it changed since this worker last saw it.
+    
+    The first page is served from the shared bytes as they are; only the tweet
+    list is decoded, once per version, for pagination, search and per-account
+    views. Returns whether a snapshot was adopted.
+    """
+    global shared_version, snapshot_version
+    
+    try:
+        shared = shared_cache.latest(shared_version)
+        if shared is None:
+            return False
+        meta = shared.meta
+        all_tweets = [Tweet.unpack(values) for values in json.loads(shared.section('tweets'))]
+        
+        # Split the merged timeline back into per-account timelines (each stays newest first)
+        by_user = {username: [] for username in meta['accounts']}
+        for tweet in all_tweets:
+            by_user.setdefault(tweet.username, []).append(tweet)
+        
+        snapshot = FeedSnapshot(
+            shared.version, shared.section('body'), meta['etag'], meta['headers'],
+            {encoding: shared.section(encoding) for encoding in ('gzip', 'br') if encoding in shared},
+            by_user
+        )
+    except Exception as e:
+        print(f"Error reading shared snapshot: {e}")
+        return False
+    
+    known_ids = {tweet.id for tweet in tweet_cache}
+    with _stats_lock:
+        # Versions stay increasing if this worker is later elected and publishes its own
+        snapshot_version = max(snapshot_version, shared.version)
+    with _publish_lock:
+        publish_snapshot(all_tweets, by_user, meta['fetched_at'], snapshot=snapshot)
+    shared_version = shared.version
+    
+    # Push what the leader fetched to this worker's /tweets/stream clients
+    if known_ids:
+        broadcaster.publish([tweet for tweet in all_tweets if tweet.id not in known_ids])
+    return True
+
+def promote_to_leader():
+    """Take over refreshing: poll each account from the newest tweet of the adopted snapshot."""
+    global last_fetch_time
+    
+    print(f"Worker {os.getpid()} is now refreshing the shared cache")
+    if tweet_cache:
+        # However old the adopted snapshot is, serve it while the first refresh runs (as warm_from_store does)
+        last_fetch_time = max(last_fetch_time, time.time() - CACHE_HARD_TTL)
+    with _timeline_lock:
+        for username, timeline in tweets_by_user.items():
+            if timeline:
+                account_timelines.setdefault(username, timeline)
+                since_ids.setdefault(username, max(int(tweet.id) for tweet in timeline))
+    start_background_refresher()
+
+def _shared_cache_loop():
+    """Adopt the leader's new snapshots, and take over if the leader goes away."""
+    while True:
+        time.sleep(SHARED_CACHE_POLL_INTERVAL)
+        if shared_cache.try_lead():
+            adopt_shared_snapshot()
+            promote_to_leader()
+            return
+        adopt_shared_snapshot()
+
+def start_shared_cache_sync():
+    """Adopt the last shared snapshot and hold the leader election, once per process."""
+    global _shared_sync_started
+    
+    if _shared_sync_started:
+        return
+    
+    with _shared_sync_lock:
+        if _shared_sync_started:
+            return
+        # Even the leader starts from the last published snapshot instead of a cold cache
+        adopt_shared_snapshot()
+        if shared_cache.try_lead():
+            promote_to_leader()
+        else:
+            threading.Thread(target=_shared_cache_loop, name='shared-cache-sync', daemon=True).start()
+        _shared_sync_started = True
+
+def fetch_shared_tweets():
+    """Return the timeline on a worker that reads the leader's snapshots instead of refreshing."""
+    if tweet_cache:
+        record_cache_stat('hits')
+        return tweet_cache
+    
+    # The leader hasn't published yet; wait for its first snapshot (or for this worker's election)
+    record_cache_stat('misses')
+    _snapshot_published.wait(SHARED_CACHE_WAIT)
+    return tweet_cache
+
+def publish_page_indexes(all_tweets, by_user, index=None):
+    """Replace page_indexes with indexes for a new snapshot.
+    
+    An account whose timeline is the same list as in the published snapshot
+    keeps its index; index, if given, is all_tweets' index.
+    """
+    global page_indexes
+    
+    previous = page_indexes
+    indexes = {}
+    for username, tweets in by_user.items():
+        unchanged = tweets_by_user.get(username) is tweets and username in previous
+        indexes[username] = previous[username] if unchanged else build_page_index(tweets)
+    indexes[ALL_ACCOUNTS_KEY] = index if index is not None else build_page_index(all_tweets)
+    page_indexes = indexes
+
+def merge_changed_timelines(by_user):
+    """Return (merged timeline, its page index) for per-account timelines by_user.
+    
+    Instead of merging every timeline again, the published tweet_cache is
+    spliced: only the tweets of accounts whose timeline changed are taken out
+    or put in, each located in the page index with a binary search, so a shard
+    refresh costs about as much as the tweets it changed. Falls back to a full
+    k-way merge when nothing is published yet or most of the timeline changed.
+    Call with _publish_lock held, so tweet_cache, tweets_by_user and
+    page_indexes all belong to the same snapshot.
+    """
+    tweets = tweet_cache
+    index = page_indexes.get(ALL_ACCOUNTS_KEY)
+    
+    removed = []
+    added = []
+    for username in tweets_by_user.keys() | by_user.keys():
+        old = tweets_by_user.get(username, [])
+        new = by_user.get(username, [])
+        if old is new:
+            continue
+        # Identity, not id: a refetched tweet is a new object with fresher metrics
+        old_objects = {id(tweet) for tweet in old}
+        new_objects = {id(tweet) for tweet in new}
+        removed.extend(tweet for tweet in old if id(tweet) not in new_objects)
+        added.extend(tweet for tweet in new if id(tweet) not in old_objects)
+    
+    total = len(tweets)
+    if index is None or len(index) != total or len(removed) + len(added) > total // 4:
+        all_tweets = list(heapq.merge(*by_user.values(), key=tweet_sort_key, reverse=True))
+        return all_tweets, build_page_index(all_tweets)
+    
+    # Edits by ascending index position; on a tie an insert goes before the removal
+    edits = []
+    for tweet in removed:
+        key = tweet_sort_key(tweet)
+        position = bisect.bisect_left(index, key)
+        if position < total and index[position] == key:
+            edits.append((position, True, key, tweet))
+    for tweet in added:
+        key = tweet_sort_key(tweet)
+        edits.append((bisect.bisect_left(index, key), False, key, tweet))
+    edits.sort(key=lambda edit: edit[:3])
+    
+    # The timeline is newest first: mirror the positions and walk the edits backwards
+    new_index = splice(index, [(position, remove, key) for position, remove, key, _ in edits])
+    all_tweets = splice(tweets, [
+        (total - 1 - position if remove else total - position, remove, tweet)
+        for position, remove, _, tweet in reversed(edits)
+    ])
+    return all_tweets, new_index
+
+def record_cache_stat(name):
+    """Increment one of the cache_stats counters."""
+    with _stats_lock:
+        cache_stats[name] += 1
+
+def get_cache_stats():
+    """Return a copy of the cache counters."""
+    with _stats_lock:
+        return dict(cache_stats)
+
+def refresh_tweet_cache():
+    """Fetch the next shard of accounts, merge its changes into the timeline and publish it to the cache.
+    
+    With one shard (up to MAX_ACCOUNTS_PER_REFRESH accounts) every refresh polls
+    every account. Accounts another worker fetches are read from the tweet store.
+    The leader shares the whole snapshot with the other workers once per cycle
+    of shards, not after each one.
+    """
+    record_cache_stat('refreshes')
+    started = time.perf_counter()
+    
+    update_accounts()
+    owned, foreign, last_shard = next_refresh_shard()
+    
+    # Resolve the shard's user ids in one batched lookup before fanning out
+    client = get_twitter_client()
+    due = owned
+    if client:
+        try:
+            with stage('resolve_ids'):
+                resolve_user_ids(client, owned)
+        except Exception as e:
+            print(f"Error resolving user ids: {str(e)}")
+        # Only poll the accounts the scheduler expects new tweets from
+        due = poll_scheduler.select(owned, rate_limits)
+    
+    # Per-account timelines double as the snapshot's username index (merge_timeline
+    # replaces timelines rather than mutating them, so they can be shared). Each is
+    # the very list published last time unless it changed since. Mock fallbacks never
+    # reach account_timelines, so those accounts keep their published timeline until
+    # their own shard comes round again.
+    published = tweets_by_user
+    with _timeline_lock:
+        by_user = {
+            username: account_timelines[username] if username in account_timelines else published.get(username, [])
+            for username in ACCOUNTS
+        }
+    with stage('fetch_accounts'):
+        by_user.update(fetch_accounts_concurrently(due))
+    if foreign:
+        with stage('read_store'):
+            by_user.update(read_foreign_timelines(foreign))
+    
+    # Only the shard's changes are merged into the published timeline
+    with _publish_lock:
+        with stage('merge'):
+            all_tweets, index = merge_changed_timelines(by_user)
+        
+        # Update cache
+        with stage('publish'):
+            publish_snapshot(all_tweets, by_user, time.time(), fetched=owned + foreign, index=index)
+            if shared_cache is not None and (last_shard or shared_version is None):
+                share_snapshot(all_tweets, by_user)
+    refresh_latency.observe(time.perf_counter() - started)
+    
+    return all_tweets
+
+def _run_refresh_holding_lock():
+    """Run a refresh on behalf of a caller that already acquired _refresh_lock."""
+    try:
+        refresh_tweet_cache()
+    except Exception as e:
+        print(f"Error refreshing tweet cache: {str(e)}")
+    finally:
+        _refresh_lock.release()
+
+def start_refresh_in_background():
+    """Start a refresh on a separate thread unless one is already running."""
+    if not _refresh_lock.acquire(blocking=False):
+        record_cache_stat('coalesced')
+        return False
+    
+    threading.Thread(target=_run_refresh_holding_lock, name='tweet-refresh', daemon=True).start()
+    return True
+
+def _background_refresh_loop():
+    """Refresh the next shard whenever the snapshot reaches its share of CACHE_SOFT_TTL."""
+    while True:
+        wait_time = last_fetch_time + CACHE_SOFT_TTL / len(shard_plan) - time.time()
+        if wait_time > 0:
+            time.sleep(wait_time)
+            continue
+        
+        if _refresh_lock.acquire(blocking=False):
+            _run_refresh_holding_lock()
+        else:
+            # A request-triggered refresh is running; check again shortly
+            time.sleep(1)
+
+def start_background_refresher():
+    """Start the background refresh scheduler once per process."""
+    global _refresher_thread
+    
+    if not BACKGROUND_REFRESH or _refresher_thread is not None:
+        return
+    
+    with _stats_lock:
+        if _refresher_thread is None:
+            _refresher_thread = threading.Thread(
+                target=_background_refresh_loop, name='tweet-refresher', daemon=True
+            )
+            _refresher_thread.start()
+
 def fetch_all_tweets():
-    """Fetch tweets from all accounts."""
-    global tweet_cache, last_fetch_time
+    """Fetch tweets from all accounts.
+    
+    The background refresher renews the cache once it is CACHE_SOFT_TTL old, so
+    requests normally get a fresh snapshot without waiting. Past CACHE_HARD_TTL
+    requests still get the last good snapshot while a single-flight refresh runs;
+    only a snapshot older than CACHE_MAX_STALENESS (or an empty cache) makes a
+    request wait for the refresh to finish.
     
-    current_time = time.time()
+    With a shared cache only the elected worker refreshes; the others serve the
+    snapshots it publishes.
+    """
+    if shared_cache is not None:
+        start_shared_cache_sync()
+        if not shared_cache.is_leader:
+            return fetch_shared_tweets()
+    if not _store_warmed:
+        warm_from_store()
+    start_background_refresher()
     
-    # Return cached data if it's still valid
-    if current_time - last_fetch_time < CACHE_DURATION and tweet_cache:
+    age = time.time() - last_fetch_time
+    if tweet_cache and age < CACHE_HARD_TTL:
+        record_cache_stat('hits')
         return tweet_cache
     
-    all_tweets = []
-    for username in ACCOUNTS:
+    if tweet_cache and age < CACHE_MAX_STALENESS:
+        record_cache_stat('stale')
+        start_refresh_in_background()
+        return tweet_cache
+    
+    if _refresh_lock.acquire(blocking=False):
+        try:
+            # Another caller may have finished a refresh while we were getting here
+            if tweet_cache and time.time() - last_fetch_time < CACHE_MAX_STALENESS:
+                record_cache_stat('hits')
+                return tweet_cache
+            record_cache_stat('misses')
+            return refresh_tweet_cache()
+        finally:
+            _refresh_lock.release()
+    
+    # A refresh is already in flight and there is nothing we may serve; wait for it
+    record_cache_stat('coalesced')
+    with _refresh_lock:
+        return tweet_cache
+
+def fetch_account_tweets(username):
+    """Return one account's tweets from the cached snapshot.
+    
+    The account's slice is served from tweets_by_user until it is
+    ACCOUNT_CACHE_DURATION old; after that only this account is refetched, with at
+    most one fetch per account in flight, and published as a new snapshot version
+    so /tweets, search and analytics see the same timeline.
+    """
+    fetch_all_tweets()
+    
+    if time.time() - account_fetch_times.get(username, 0) < ACCOUNT_CACHE_DURATION:
+        return tweets_by_user.get(username, [])
+    if shared_cache is not None and not shared_cache.is_leader:
+        # Only the leader calls the API; serve the shared snapshot's slice
+        return tweets_by_user.get(username, [])
+    
+    lock = _account_locks.setdefault(username, threading.Lock())
+    if not lock.acquire(blocking=False):
+        # Someone is already refetching this account; serve what we have
+        record_cache_stat('coalesced')
+        return tweets_by_user.get(username, [])
+    
+    try:
         user_tweets = fetch_user_tweets(username)
-        all_tweets.extend(user_tweets)
+        publish_account_timelines({username: user_tweets}, time.time())
+        return user_tweets
+    finally:
+        lock.release()
+
+def publish_account_timelines(timelines, fetched_at):
+    """Publish a new snapshot version with some accounts' timelines replaced.
     
-    # Sort tweets by creation date (newest first)
-    all_tweets.sort(key=lambda x: str(x['created_at']), reverse=True)
+    The snapshot's own fetch time (and so the next full refresh) is unchanged;
+    only the replaced accounts are marked as fetched at fetched_at.
+    """
+    with _publish_lock:
+        by_user = dict(tweets_by_user)
+        by_user.update(timelines)
+        all_tweets, index = merge_changed_timelines(by_user)
+        publish_snapshot(all_tweets, by_user, last_fetch_time, fetched=(), index=index)
+        account_fetch_times.update(dict.fromkeys(timelines, fetched_at))
+
+def fetch_accounts_tweets(usernames):
+    """Return the combined timeline for several accounts, newest first."""
+    timelines = [fetch_account_tweets(username) for username in usernames]
+    return list(heapq.merge(*timelines, key=tweet_sort_key, reverse=True))
+
+def parse_accounts_param(value):
+    """Split an ?accounts=a,b query value into known and unknown usernames."""
+    requested = [name.strip().lstrip('@') for name in value.split(',') if name.strip()]
+    known, unknown = [], []
+    for name in requested:
+        account = account_registry.canonical(name)
+        if account:
+            known.append(account)
+        else:
+            unknown.append(name)
+    return known, unknown
+
+def encode_cursor(key):
+    """Encode a (epoch seconds, numeric id) sort key as a cursor string."""
+    return f"{key[0]}_{key[1]}"
+
+def decode_cursor(value):
+    """Decode a cursor string; raises ValueError if it is malformed."""
+    created_at, sep, tweet_id = value.partition('_')
+    if not sep or not tweet_id.isdigit():
+        raise ValueError(f"Invalid cursor: {value}")
+    return (int(created_at), int(tweet_id))
+
+def history_horizon(usernames):
+    """Return the oldest sort key down to which the in-memory timelines are complete.
     
-    # Update cache
-    tweet_cache = all_tweets
-    last_fetch_time = current_time
+    Each account keeps only its newest MAX_TWEETS_PER_ACCOUNT tweets, so a merged
+    list can be missing older tweets from busier accounts below the oldest key of
+    any truncated timeline. Returns None when nothing was truncated or there is no
+    store to fall back to.
+    """
+    if not get_tweet_store():
+        return None
+    oldest_keys = [
+        page_indexes[username][0] for username in usernames
+        if len(page_indexes.get(username, ())) >= MAX_TWEETS_PER_ACCOUNT
+    ]
+    return max(oldest_keys) if oldest_keys else None
+
+def paginate(tweets, index, limit, before=None, after=None, usernames=None, horizon=None):
+    """Return (page, older_cursor, newer_cursor) for a newest-first tweet list.
     
-    return all_tweets
+    index holds the list's sort keys in ascending order, so cursors are located
+    with a binary search instead of a scan. `before` pages towards older tweets
+    and continues into the tweet store below `horizon` (see history_horizon);
+    `after` returns the tweets immediately newer than the cursor.
+    """
+    total = len(tweets)
+    floor = bisect.bisect_left(index, horizon) if horizon is not None else 0
+    
+    if after is not None:
+        start = bisect.bisect_right(index, after)
+        end = min(total, start + limit)
+    else:
+        end = bisect.bisect_left(index, before) if before is not None else total
+        start = min(end, max(floor, end - limit))
+    
+    # index is ascending while tweets is newest first
+    page = tweets[total - end:total - start]
+    has_older = start > floor
+    has_newer = end < total
+    
+    # Past the complete in-memory window: read older history from the store
+    if after is None and len(page) < limit:
+        store = get_tweet_store()
+        cursor = tweet_sort_key(page[-1]) if page else before
+        if cursor is None and floor < len(index):
+            cursor = index[floor]
+        if store and cursor is not None:
+            try:
+                older = store.tweets_before(cursor[0], limit - len(page) + 1, usernames, cursor[1])
+            except Exception as e:
+                print(f"Error reading tweet history: {e}")
+                older = []
+            has_older = len(older) > limit - len(page)
+            page = page + older[:limit - len(page)]
+    
+    older_cursor = encode_cursor(tweet_sort_key(page[-1])) if page and has_older else None
+    newer_cursor = encode_cursor(tweet_sort_key(page[0])) if page and (has_newer or before is not None) else None
+    return page, older_cursor, newer_cursor
+
+def paginated_response(tweets, index, usernames):
+    """Build a JSON response for one page of tweets from the request's limit/before/after."""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        before = request.args.get('before')
+        after = request.args.get('after')
+        before = decode_cursor(before) if before else None
+        after = decode_cursor(after) if after else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if before is not None and after is not None:
+        return jsonify({"error": "Use either before or after, not both"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    page, older_cursor, newer_cursor = paginate(
+        tweets, index, limit, before, after, usernames, history_horizon(usernames)
+    )
+    response = jsonify(page)
+    
+    # Cursors travel in headers so the body stays a plain list of tweets
+    links = []
+    if older_cursor:
+        response.headers['X-Next-Cursor'] = older_cursor
+        links.append(f'<{request.path}?limit={limit}&before={older_cursor}>; rel="next"')
+    if newer_cursor:
+        response.headers['X-Prev-Cursor'] = newer_cursor
+        links.append(f'<{request.path}?limit={limit}&after={newer_cursor}>; rel="prev"')
+    if links:
+        response.headers['Link'] = ', '.join(links)
+    return response
+
+def profiling_requested():
+    """Return whether to trace this request: opted in by header or query flag, then sampled."""
+    if not PROFILE_REQUESTS:
+        return False
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    if flag in (None, '', '0'):
+        return False
+    return random.random() < PROFILE_SAMPLE_RATE
+
+@app.before_request
+def start_request_profile():
+    """Start a stage trace (and a cProfile run, if dumps are enabled) for opted-in requests."""
+    if not profiling_requested():
+        return
+    g.trace_token = start_trace()
+    if profile_ring and _profiler_lock.acquire(blocking=False):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def finish_request_profile(response):
+    """Add the Server-Timing header and keep the cProfile dump if the request was slow.
+    
+    cProfile only sees the request thread; time spent on fetch workers shows up as
+    waiting, so compare it with the Server-Timing stages.
+    """
+    trace = current_trace()
+    if trace is None:
+        return response
+    
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+        if trace.elapsed() >= PROFILE_SLOW_THRESHOLD:
+            try:
+                path = profile_ring.save(profiler, f"{request.method} {request.path}")
+                response.headers['X-Profile-Dump'] = os.path.basename(path)
+            except Exception as e:
+                print(f"Error saving request profile: {e}")
+    
+    response.headers['Server-Timing'] = trace.server_timing()
+    return response
+
+@app.teardown_request
+def end_request_profile(exc):
+    """Stop tracing, including for requests that raised before after_request ran."""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+    token = g.pop('trace_token', None)
+    if token is not None:
+        end_trace(token)
 
 @app.route('/')
 def index():
@@ -272,21 +1523,283 @@ def index():
 
 @app.route('/tweets')
 def get_tweets():
-    """API endpoint to get all tweets."""
-    tweets = fetch_all_tweets()
-    return jsonify(tweets)
+    """API endpoint to get a page of all tweets, or only some accounts' with ?accounts=a,b.
+    
+    Pages hold up to ?limit= tweets (DEFAULT_PAGE_SIZE by default); pass the
+    X-Next-Cursor header as ?before= for older tweets, or X-Prev-Cursor as ?after=
+    for newer ones.
+    """
+    accounts_param = request.args.get('accounts')
+    if accounts_param:
+        usernames, unknown = parse_accounts_param(accounts_param)
+        if unknown:
+            return jsonify({"error": f"User not found: {', '.join(unknown)}"}), 404
+        tweets = fetch_accounts_tweets(usernames)
+        return paginated_response(tweets, build_page_index(tweets), usernames)
+    
+    with stage('fetch'):
+        tweets = fetch_all_tweets()
+    
+    # The default page was serialized (and compressed) when the snapshot was published
+    snapshot = current_snapshot
+    if not request.args.keys() - {'profile'} and snapshot is not None:
+        with stage('serialize'):
+            return snapshot.response()
+    
+    index = page_indexes.get(ALL_ACCOUNTS_KEY)
+    if index is None or len(index) != len(tweets):
+        index = build_page_index(tweets)
+    with stage('serialize'):
+        return paginated_response(tweets, index, list(ACCOUNTS))
+
+@app.route('/tweets/stream')
+def stream_tweets():
+    """Server-Sent Events stream that pushes newly fetched tweets as `tweets` events.
+    
+    Event ids are publish sequence numbers. Reconnecting clients send
+    Last-Event-ID and are first replayed the updates after it from the replay
+    log; if it has already left the log (or is from before a restart) they get
+    a `reset` event instead and reload the list, rather than a partial replay
+    with a gap in it. A comment line is sent every SSE_HEARTBEAT_INTERVAL
+    seconds to keep idle connections open.
+    """
+    fetch_all_tweets()
+    
+    subscriber, backlog = broadcaster.subscribe(request.headers.get('Last-Event-ID'))
+    
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            yield from backlog
+            while True:
+                try:
+                    message = subscriber.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/stats')
+def get_stats():
+    """API endpoint to get cache counters, rate-limit headroom, polling state and connection reuse."""
+    stats = get_cache_stats()
+    stats['rate_limits'] = rate_limits.snapshot()
+    stats['polling'] = poll_scheduler.snapshot()
+    if twitter_client is not None:
+        stats['connections'] = twitter_client.session.connection_stats()
+    if shared_cache is not None:
+        stats['shared_cache'] = {
+            'backend': shared_cache.name,
+            'leader': shared_cache.is_leader,
+            'version': shared_version
+        }
+    return jsonify(stats)
+
+def collect_feed_metrics():
+    """Build the /metrics families whose values already live in other structures."""
+    cache_requests = Counter('feed_cache_requests_total', 'Timeline cache lookups by result', ['result'])
+    refreshes = Counter('feed_cache_refreshes_total', 'Full cache refreshes started')
+    for name, value in get_cache_stats().items():
+        if name == 'refreshes':
+            refreshes.inc(value)
+        else:
+            cache_requests.inc(value, result=name)
+    
+    cached_tweets = Gauge('feed_cached_tweets', 'Tweets in the merged timeline cache')
+    cached_tweets.set(len(tweet_cache))
+    cache_age = Gauge('feed_cache_age_seconds', 'Seconds since the cached timeline was fetched')
+    cache_age.set(round(time.time() - last_fetch_time, 3) if last_fetch_time else 0)
+    
+    snapshot_bytes = Gauge('feed_snapshot_bytes', 'Size of the pre-serialized first page', ['encoding'])
+    snapshot = current_snapshot
+    if snapshot is not None:
+        snapshot_bytes.set(len(snapshot.body), encoding='identity')
+        for encoding, body in snapshot.encoded.items():
+            snapshot_bytes.set(len(body), encoding=encoding)
+    
+    remaining = Gauge('feed_rate_limit_remaining', 'Requests left in the current rate-limit window', ['endpoint'])
+    headroom = Gauge('feed_rate_limit_headroom_ratio', 'Fraction of the rate-limit window left', ['endpoint'])
+    reset = Gauge('feed_rate_limit_reset_timestamp_seconds', 'When the rate-limit window resets', ['endpoint'])
+    for endpoint, quota in rate_limits.snapshot().items():
+        remaining.set(quota['remaining'], endpoint=endpoint)
+        headroom.set(quota['headroom'], endpoint=endpoint)
+        reset.set(quota['reset'], endpoint=endpoint)
+    
+    return [cache_requests, refreshes, cached_tweets, cache_age, snapshot_bytes, remaining, headroom, reset]
+
+metrics_registry.register_collector(collect_feed_metrics)
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus endpoint: fetch latencies, cache results, errors, snapshot size and rate-limit headroom."""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+def parse_time_param(value):
+    """Parse a since/until query value given as epoch seconds or ISO 8601."""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return normalize_created_at(value)
+
+@app.route('/tweets/search')
+def search_tweets():
+    """API endpoint to search cached tweets by words, #hashtags, $cashtags and @mentions.
+    
+    ?q= terms must all match, OR separates alternatives (e.g. "etf inflows OR $ibit").
+    Optional ?accounts=a,b, ?since= / ?until= (epoch seconds or ISO 8601),
+    ?sort=engagement|recent and ?limit=. The match count is in X-Total-Count.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query ?q="}), 400
+    
+    sort = request.args.get('sort', 'engagement')
+    if sort not in SORT_ORDERS:
+        return jsonify({"error": f"sort must be one of: {', '.join(SORT_ORDERS)}"}), 400
+    
+    usernames = None
+    accounts_param = request.args.get('accounts')
+    if accounts_param:
+        usernames, unknown = parse_accounts_param(accounts_param)
+        if unknown:
+            return jsonify({"error": f"User not found: {', '.join(unknown)}"}), 404
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        since = parse_time_param(request.args.get('since'))
+        until = parse_time_param(request.args.get('until'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    with stage('fetch'):
+        fetch_all_tweets()
+    with stage('search'):
+        total, results = search_index.search(query, limit, since, until, usernames, sort)
+    with stage('serialize'):
+        response = jsonify(results)
+    response.headers['X-Total-Count'] = str(total)
+    return response
+
+def get_engagement_columns(snapshot):
+    """Return the columns for snapshot, building them (and dropping old reports) when its version changes.
+    
+    The timelines and the version both come from the one snapshot, so the
+    columns never pair one refresh's tweets with another's version.
+    """
+    global engagement_columns, engagement_version
+    
+    version = snapshot.version if snapshot is not None else 0
+    by_user = snapshot.by_user if snapshot is not None else {}
+    with _analytics_lock:
+        if engagement_columns is None or engagement_version != version:
+            engagement_columns = EngagementColumns(by_user, previous=engagement_columns)
+            engagement_version = version
+            _analytics_cache.clear()
+        return engagement_columns
+
+def build_engagement_report(columns, version, usernames, since, until, bucket, window, points, top, pcts):
+    """Compute one /analytics/engagement report and return it serialized."""
+    rows = columns.select(usernames, since, until)
+    created = columns.created if rows is None else columns.created[rows]
+    report = {
+        'version': version,
+        'tweets': int(len(created)),
+        'from': int(created.min()) if len(created) else None,
+        'to': int(created.max()) if len(created) else None,
+        'percentiles': percentiles(columns, rows, pcts),
+        'accounts': account_stats(columns, rows),
+        'windows': {
+            'bucket': bucket,
+            'window': window,
+            'points': rolling_windows(columns, rows, bucket, window, points),
+        },
+        'top': [dict(tweet.to_json(), engagement=score) for score, tweet in top_tweets(columns, rows, top)],
+    }
+    return app.json.dumps(report, separators=(',', ':')).encode('utf-8')
+
+@app.route('/analytics/engagement')
+def get_engagement_analytics():
+    """API endpoint for engagement statistics over the cached tweets.
+    
+    Returns per-account totals and rates, ?percentiles= (default 50,90,99),
+    rolling windows (?bucket= seconds, ?window= buckets per rolling total,
+    ?points= buckets returned) and the ?top= most engaging tweets, optionally
+    for ?accounts=a,b and ?since= / ?until= only. Reports are cached until the
+    next snapshot is published.
+    """
+    if not NUMPY_AVAILABLE:
+        return jsonify({"error": "Engagement analytics require numpy"}), 503
+    
+    usernames = None
+    accounts_param = request.args.get('accounts')
+    if accounts_param:
+        usernames, unknown = parse_accounts_param(accounts_param)
+        if unknown:
+            return jsonify({"error": f"User not found: {', '.join(unknown)}"}), 404
+    
+    try:
+        since = parse_time_param(request.args.get('since'))
+        until = parse_time_param(request.args.get('until'))
+        bucket = int(request.args.get('bucket', 3600))
+        window = int(request.args.get('window', 24))
+        points = int(request.args.get('points', 48))
+        top = int(request.args.get('top', 10))
+        pcts = request.args.get('percentiles')
+        pcts = tuple(float(value) for value in pcts.split(',')) if pcts else DEFAULT_PERCENTILES
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if bucket < 60 or not 1 <= window <= 1000 or not 1 <= points <= 1000:
+        return jsonify({"error": "bucket must be at least 60 seconds, window and points 1-1000"}), 400
+    if not 0 <= top <= MAX_PAGE_SIZE or not pcts or not all(0 <= value <= 100 for value in pcts):
+        return jsonify({"error": f"top must be 0-{MAX_PAGE_SIZE} and percentiles 0-100"}), 400
+    
+    with stage('fetch'):
+        fetch_all_tweets()
+    snapshot = current_snapshot
+    version = snapshot.version if snapshot is not None else 0
+    
+    key = (tuple(usernames) if usernames else None, since, until, bucket, window, points, top, pcts)
+    with stage('analytics'):
+        columns = get_engagement_columns(snapshot)
+        body = _analytics_cache.get(key)
+        if body is None:
+            body = build_engagement_report(
+                columns, version, usernames, since, until, bucket, window, points, top, pcts
+            )
+            with _analytics_lock:
+                if engagement_version == version:
+                    if len(_analytics_cache) >= ANALYTICS_CACHE_SIZE:
+                        _analytics_cache.pop(next(iter(_analytics_cache)))
+                    _analytics_cache[key] = body
+    return Response(body, mimetype='application/json')
 
 @app.route('/tweets/<username>')
 def get_user_tweets(username):
-    """API endpoint to get tweets for a specific user."""
-    if username not in ACCOUNTS:
+    """API endpoint to get a page of tweets for a specific user (same parameters as /tweets)."""
+    username = account_registry.canonical(username)
+    if username is None:
         return jsonify({"error": "User not found"}), 404
     
-    user_tweets = fetch_user_tweets(username)
-    return jsonify(user_tweets)
+    user_tweets = fetch_account_tweets(username)
+    index = page_indexes.get(username)
+    if index is None or len(index) != len(user_tweets):
+        index = build_page_index(user_tweets)
+    return paginated_response(user_tweets, index, [username])
 
 def create_templates():
-    """Create necessary template files if they don't exist."""
+    """Create the template files, rewriting them only when their content changed."""
     # Create templates directory if it doesn't exist
     if not os.path.exists('templates'):
         os.makedirs('templates')
@@ -508,6 +2021,10 @@ def create_templates():
                 <button class="btn account-btn" data-username="{{ account }}">@{{ account }}</button>
                 {% endfor %}
             </div>
+            <form id="searchForm" class="d-flex mt-3" role="search">
+                <input id="searchInput" class="form-control me-2" type="search" placeholder="Search words, #hashtags, $cashtags, @mentions (OR for alternatives)" aria-label="Search tweets">
+                <button class="btn account-btn" type="submit">Search</button>
+            </form>
         </div>
         
         <div id="loading" class="loading">
@@ -519,6 +2036,10 @@ def create_templates():
         
         <div id="tweetContainer"></div>
         
+        <div class="text-center mb-4">
+            <button id="loadMoreBtn" class="btn account-btn" style="display: none;">Load more</button>
+        </div>
+        
         <div id="noTweets" class="text-center py-5" style="display: none;">
             <svg xmlns="http://www.w3.org/2000/svg" width="64" height="64" fill="currentColor" class="bi bi-emoji-frown mb-3 text-muted" viewBox="0 0 16 16">
                 <path d="M8 15A7 7 0 1 1 8 1a7 7 0 0 1 0 14m0 1A8 8 0 1 0 8 0a8 8 0 0 0 0 16"/>
@@ -538,52 +2059,70 @@ def create_templates():
         const loadingElement = document.getElementById('loading');
         const noTweetsElement = document.getElementById('noTweets');
         const refreshBtn = document.getElementById('refreshBtn');
-        const accountButtons = document.querySelectorAll('.account-btn');
+        const accountButtons = document.querySelectorAll('.account-filter .account-btn');
+        const loadMoreBtn = document.getElementById('loadMoreBtn');
+        const searchForm = document.getElementById('searchForm');
+        const searchInput = document.getElementById('searchInput');
         
         // Variables
         let currentUsername = 'all';
-        let allTweets = [];
+        let currentQuery = '';
+        let nextCursor = null;
         
-        // Fetch tweets function
-        async function fetchTweets() {
-            loadingElement.style.display = 'block';
-            tweetContainer.style.display = 'none';
-            noTweetsElement.style.display = 'none';
+        // Fetch one page of tweets (the server filters by account and paginates)
+        async function fetchTweets(append = false) {
+            if (!append) {
+                nextCursor = null;
+                loadingElement.style.display = 'block';
+                tweetContainer.style.display = 'none';
+                noTweetsElement.style.display = 'none';
+            }
+            loadMoreBtn.style.display = 'none';
             
             try {
-                const response = await fetch('/tweets');
+                let url = currentUsername === 'all' ? '/tweets' : `/tweets/${encodeURIComponent(currentUsername)}`;
+                if (currentQuery) {
+                    // Search results come ranked by engagement in a single page
+                    url = `/tweets/search?q=${encodeURIComponent(currentQuery)}`;
+                    if (currentUsername !== 'all') {
+                        url += `&accounts=${encodeURIComponent(currentUsername)}`;
+                    }
+                } else if (append && nextCursor) {
+                    url += `?before=${encodeURIComponent(nextCursor)}`;
+                }
+                const response = await fetch(url);
                 if (!response.ok) {
                     throw new Error('Failed to fetch tweets');
                 }
                 
-                allTweets = await response.json();
-                displayTweets(currentUsername);
+                nextCursor = response.headers.get('X-Next-Cursor');
+                displayTweets(await response.json(), append);
+                loadMoreBtn.style.display = nextCursor ? 'inline-block' : 'none';
             } catch (error) {
                 console.error('Error fetching tweets:', error);
                 loadingElement.style.display = 'none';
-                noTweetsElement.style.display = 'block';
+                if (!append) {
+                    noTweetsElement.style.display = 'block';
+                }
             }
         }
         
-        // Display tweets for selected username
-        function displayTweets(username) {
+        // Display a page of tweets, optionally after (or before) the ones already shown
+        function displayTweets(tweetsToDisplay, append = false, prepend = false) {
             loadingElement.style.display = 'none';
             
-            // Filter tweets if needed
-            let tweetsToDisplay = allTweets;
-            if (username !== 'all') {
-                tweetsToDisplay = allTweets.filter(tweet => tweet.username.toLowerCase() === username.toLowerCase());
-            }
-            
             // Check if we have tweets to display
-            if (tweetsToDisplay.length === 0) {
+            if (tweetsToDisplay.length === 0 && !append) {
                 tweetContainer.style.display = 'none';
                 noTweetsElement.style.display = 'block';
                 return;
             }
             
             // Display tweets
-            tweetContainer.innerHTML = '';
+            if (!append && !prepend) {
+                tweetContainer.innerHTML = '';
+            }
+            const insertionPoint = prepend ? tweetContainer.firstChild : null;
             tweetsToDisplay.forEach(tweet => {
                 // Format date
                 const tweetDate = new Date(tweet.created_at);
@@ -642,7 +2181,7 @@ def create_templates():
                     ${metricsHtml}
                 `;
                 
-                tweetContainer.appendChild(tweetElement);
+                tweetContainer.insertBefore(tweetElement, insertionPoint);
             });
             
             tweetContainer.style.display = 'block';
@@ -683,7 +2222,13 @@ def create_templates():
         }
         
         // Event listeners
-        refreshBtn.addEventListener('click', fetchTweets);
+        refreshBtn.addEventListener('click', () => fetchTweets());
+        loadMoreBtn.addEventListener('click', () => fetchTweets(true));
+        searchForm.addEventListener('submit', event => {
+            event.preventDefault();
+            currentQuery = searchInput.value.trim();
+            fetchTweets();
+        });
         
         accountButtons.forEach(button => {
             button.addEventListener('click', function() {
@@ -693,12 +2238,33 @@ def create_templates():
                 accountButtons.forEach(btn => btn.classList.remove('active'));
                 this.classList.add('active');
                 
-                // Update current username and display tweets
+                // Update current username and fetch its tweets
                 currentUsername = username;
-                displayTweets(username);
+                fetchTweets();
             });
         });
         
+        // Live updates: the server pushes newly fetched tweets
+        const stream = new EventSource('/tweets/stream');
+        stream.addEventListener('tweets', event => {
+            if (currentQuery) {
+                return;
+            }
+            const newTweets = JSON.parse(event.data).filter(
+                tweet => currentUsername === 'all' || tweet.username === currentUsername
+            );
+            if (newTweets.length > 0) {
+                noTweetsElement.style.display = 'none';
+                displayTweets(newTweets, false, true);
+            }
+        });
+        // Sent instead of a replay when the missed updates are no longer in the server's log
+        stream.addEventListener('reset', () => {
+            if (!currentQuery) {
+                fetchTweets();
+            }
+        });
+        
         // Initial fetch
         fetchTweets();
     });
@@ -706,19 +2272,51 @@ def create_templates():
 {% endblock %}"""
 
     # Write template files
-    with open(os.path.join('templates', 'base.html'), 'w') as f:
-        f.write(base_html)
+    write_template('base.html', base_html)
+    write_template('index.html', index_html)
+
+def write_template(name, content):
+    """Write a template file unless it already holds exactly this content.
     
-    with open(os.path.join('templates', 'index.html'), 'w') as f:
-        f.write(index_html)
+    Leaving unchanged files alone keeps their mtime, so Jinja's compiled
+    template cache and the reloader don't treat every start as a change.
+    """
+    path = os.path.join('templates', name)
+    data = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if hashlib.sha1(f.read()).digest() == hashlib.sha1(data).digest():
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
 
-if __name__ == '__main__':
-    # Create the template files
+def warm_start():
+    """Load the last published snapshot (or the stored tweets) before serving any request."""
+    if shared_cache is not None:
+        start_shared_cache_sync()
+    if not tweet_cache:
+        warm_from_store()
+
+def serve(host='0.0.0.0', port=3000, debug=False):
+    """Start the app; without debug there is no debugger or reloader.
+    
+    The cache is loaded before the server starts listening, so the first
+    /tweets request is answered from memory while a refresh runs behind it.
+    """
     create_templates()
+    # With the reloader, only the child process serves (and may be elected); the watcher just restarts it
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_start()
     
-    # Run the Flask app
     print(f"Starting Bitcoin X Feed app...")
     print(f"Monitoring accounts: {', '.join(ACCOUNTS)}")
     print(f"Using MOCK data: {'Yes (API credentials not found)' if not TWITTER_BEARER_TOKEN else 'No'}")
-    print(f"Open http://localhost:3000 in your browser to view the app")
-    app.run(host='0.0.0.0', port=3000, debug=True)
\ No newline at end of file
+    print(f"Open http://localhost:{port} in your browser to view the app")
+    app.run(host=host, port=port, debug=debug, use_reloader=debug)
+
+if __name__ == '__main__':
+    # Run the Flask app (use `python run.py --production` to serve without the debugger and reloader)
+    serve(debug=True)
\ No newline at end of file